@@ -1,25 +1,748 @@
 """
 Script para extraer texto de PDFs usando BLIP directamente.
 Genera captions incondicionales de imágenes (y las traduce al español) 
-usando BlipProcessor, BlipForConditionalGeneration y un pipeline de traducción.
+usando BlipProcessor, BlipForConditionalGeneration y un modelo de traducción (MarianMT).
 """
 
 import fitz  # PyMuPDF
 import torch
-# IMPORTACIÓN CLAVE: Se añade 'pipeline' para la traducción
-from transformers import BlipProcessor, BlipForConditionalGeneration, pipeline
+from transformers import BlipProcessor, BlipForConditionalGeneration, MarianMTModel, MarianTokenizer
 from PIL import Image
+import numpy as np
+import functools
+import hashlib
+import importlib.util
 import io
+import logging
 import os
+import re
+import threading
 import time
-from typing import Optional
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import List, Optional, Union
+
+try:
+    import pytesseract
+except ImportError:  # Solo necesario para extract_text_with_blip_and_ocr
+    pytesseract = None
+
+logger = logging.getLogger(__name__)
+
+# BLIP redimensiona internamente a 384x384: renderizar para BLIP a más resolución
+# solo agrega costo de render y de copia
+BLIP_DPI = 96
+BLIP_MAX_SIDE = 512
+# Lado de la imagen de entrada de BLIP (blip_dpi="auto" renderiza a ~1.5x ese lado)
+BLIP_INPUT_SIDE = 384
+
+# Páginas con más caracteres de texto directo (y sin imágenes) se consideran de solo texto
+TEXT_ONLY_MIN_CHARS = 200
+
+_WS_MULTI = re.compile(r"\s+")
+
+# Cache LRU de captions (ya traducidos) por huella de la imagen, para no
+# volver a pasar por BLIP páginas repetidas (portadas, separadores, en blanco)
+CAPTION_CACHE_SIZE = 1024
+_caption_cache = OrderedDict()
+_caption_cache_lock = threading.Lock()
+
+
+_DTYPES = {"fp16": torch.float16, "bf16": torch.bfloat16, "fp32": torch.float32}
+
+
+def _select_dtype(device: str, dtype: Union[str, torch.dtype, None] = None) -> torch.dtype:
+    """
+    Elige la precisión de los modelos según el dispositivo.
+    Por defecto en CUDA se usa FP16 (mitad de tráfico de memoria y tensor cores);
+    en CPU se mantiene FP32. BF16 evita los overflows de FP16 en GPUs Ampere+.
+    
+    Args:
+        device (str): Dispositivo ya resuelto ("cpu" o "cuda")
+        dtype (str | torch.dtype, optional): "fp16", "bf16", "fp32" o un torch.dtype
+    
+    Returns:
+        torch.dtype: Precisión a usar
+    """
+    if dtype is None or dtype == "auto":
+        return torch.float16 if device == "cuda" else torch.float32
+    if isinstance(dtype, str):
+        if dtype not in _DTYPES:
+            raise ValueError(f"Precisión no soportada: {dtype} (opciones: {', '.join(_DTYPES)})")
+        dtype = _DTYPES[dtype]
+    if dtype == torch.bfloat16 and device == "cuda" and not torch.cuda.is_bf16_supported():
+        print("⚠️ La GPU no soporta BF16, se usa FP16")
+        return torch.float16
+    return dtype
+
+
+def _autocast(device: str, dtype: torch.dtype = torch.float16):
+    """
+    Contexto de autocast en la precisión del modelo para CUDA (no-op en CPU o en FP32).
+    """
+    if device == "cuda" and dtype in (torch.float16, torch.bfloat16):
+        return torch.autocast("cuda", dtype=dtype)
+    return nullcontext()
+
+
+def _freeze(model):
+    """
+    Deja el modelo listo para inferencia: modo eval y sin gradientes en los
+    parámetros, para que no se cuele overhead de autograd.
+    """
+    model.eval()
+    for param in model.parameters():
+        param.requires_grad_(False)
+    return model
+
+
+def _maybe_compile(fn, device: str, mode: str = "reduce-overhead", dynamic: Optional[bool] = None):
+    """
+    Compila un módulo/función con torch.compile en CUDA. "reduce-overhead"
+    captura CUDA graphs y elimina el overhead de lanzamiento de kernels;
+    "max-autotune" además elige los kernels de Triton más rápidos (compila más
+    lento, conviene para PDFs largos). Ambos solo convienen con formas fijas:
+    para entradas de forma variable usar mode="default" con dynamic=True.
+    En CPU, o si la compilación no está disponible, se devuelve sin cambios.
+    """
+    if device != "cuda" or not hasattr(torch, "compile"):
+        return fn
+    try:
+        return torch.compile(fn, mode=mode, fullgraph=False, dynamic=dynamic)
+    except Exception as e:
+        print(f"⚠️ torch.compile no disponible, se usa el modelo sin compilar: {e}")
+        return fn
+
+
+DEFAULT_BLIP_MODEL = "Salesforce/blip-image-captioning-base"
+TRANSLATOR_MODEL = "Helsinki-NLP/opus-mt-en-es"
+# Modelo de traducción convertido a CTranslate2 (en la cache del usuario, no en
+# el directorio desde el que se ejecuta el script)
+CT2_TRANSLATOR_DIR = os.getenv(
+    "CT2_TRANSLATOR_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "pdf_to_text_blip", "opus-ct2-int8")
+)
+# Modo de torch.compile para el encoder de visión ("reduce-overhead" o "max-autotune")
+VISION_COMPILE_MODE = os.getenv("BLIP_COMPILE_MODE", "reduce-overhead")
+# Engines de TensorRT del encoder de visión (opcional, use_tensorrt=True), en la
+# cache del usuario para reutilizarlos sin importar desde dónde se ejecute
+TRT_ENGINE_DIR = os.getenv(
+    "BLIP_TRT_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "pdf_to_text_blip", "blip-trt")
+)
+# Cuantización INT8 dinámica de BLIP en CPU: más rápida pero puede cambiar los
+# captions, así que es opcional (quantize=True, --quantize o BLIP_QUANTIZE=1)
+QUANTIZE_BLIP = bool(os.getenv("BLIP_QUANTIZE"))
+TRT_MAX_BATCH = 32
+
+
+class CTranslate2Translator:
+    """
+    Traductor en-es sobre CTranslate2 con pesos INT8.
+    Expone la misma interfaz de llamada que el pipeline de traducción de
+    Hugging Face: recibe un texto (o lista) y devuelve [{'translation_text': ...}].
+    """
+    
+    def __init__(self, model_dir: str, device: str):
+        import ctranslate2
+        from transformers import AutoTokenizer
+        
+        compute_type = "int8" if device == "cpu" else "int8_float16"
+        self.translator = ctranslate2.Translator(model_dir, device=device, compute_type=compute_type)
+        self.tokenizer = AutoTokenizer.from_pretrained(TRANSLATOR_MODEL)
+    
+    def __call__(self, texts, max_length: int = 100, **kwargs) -> list:
+        if isinstance(texts, str):
+            texts = [texts]
+        
+        tokens = [self.tokenizer.convert_ids_to_tokens(self.tokenizer.encode(text)) for text in texts]
+        results = self.translator.translate_batch(tokens, beam_size=1, max_decoding_length=max_length)
+        
+        return [
+            {'translation_text': self.tokenizer.decode(
+                self.tokenizer.convert_tokens_to_ids(result.hypotheses[0]),
+                skip_special_tokens=True)}
+            for result in results
+        ]
+
+
+class MarianTranslator:
+    """
+    Traductor en-es que llama directamente a MarianMTModel.generate con un lote
+    pre-tokenizado (greedy, un solo beam, KV cache), sin el post-procesado por
+    elemento del pipeline de traducción de Hugging Face.
+    Misma interfaz de llamada que CTranslate2Translator.
+    """
+    
+    def __init__(self, device: str, dtype: torch.dtype):
+        self.device = device
+        self.tokenizer = MarianTokenizer.from_pretrained(TRANSLATOR_MODEL)
+        self.model = MarianMTModel.from_pretrained(TRANSLATOR_MODEL, torch_dtype=dtype)
+        self.model.to(device)
+        _freeze(self.model)
+        # Dentro de generate() el forward recibe largos distintos en cada paso
+        # (y lotes con distinto padding): con CUDA graphs ("reduce-overhead")
+        # se recapturaría un grafo por forma
+        eager_forward = self.model.forward
+        self.model.forward = _maybe_compile(eager_forward, device, mode="default", dynamic=True)
+        if self.model.forward is not eager_forward:
+            # Los errores de compilación aparecen en la primera llamada: se
+            # prueba con una frase corta y, si falla, se vuelve al forward original
+            try:
+                self(["warm up"], max_length=8)
+            except Exception as e:
+                print(f"⚠️ Falló la compilación del traductor, se usa sin compilar: {e}")
+                self.model.forward = eager_forward
+    
+    def __call__(self, texts, max_length: int = 60, batch_size: int = 16, **kwargs) -> list:
+        if isinstance(texts, str):
+            texts = [texts]
+        
+        translations = []
+        for start in range(0, len(texts), batch_size):
+            enc = self.tokenizer(texts[start:start + batch_size], return_tensors="pt",
+                                 padding=True, truncation=True, max_length=128).to(self.device)
+            with torch.inference_mode():
+                out = self.model.generate(**enc, num_beams=1, do_sample=False, use_cache=True,
+                                          max_new_tokens=max_length)
+            translations.extend(self.tokenizer.batch_decode(out, skip_special_tokens=True))
+        
+        return [{'translation_text': text} for text in translations]
+
+
+class TensorRTVisionEncoder(torch.nn.Module):
+    """
+    Encoder de visión de BLIP ejecutado con un engine de TensorRT.
+    Reemplaza a model.vision_model: recibe pixel_values y devuelve la misma
+    salida que generate() espera del encoder (last_hidden_state), mientras el
+    decoder de texto sigue en PyTorch.
+    """
+    
+    def __init__(self, engine_path: str, fallback: torch.nn.Module):
+        """
+        Args:
+            engine_path (str): Engine serializado (ver _build_trt_engine)
+            fallback (torch.nn.Module): Encoder original de PyTorch
+        """
+        import tensorrt as trt
+        
+        super().__init__()
+        # Mismo nombre que usa torch.compile para el módulo original, así
+        # BlipPdfExtractor._warmup puede volver a él si el engine falla
+        self._orig_mod = fallback
+        
+        runtime = trt.Runtime(trt.Logger(trt.Logger.WARNING))
+        with open(engine_path, "rb") as f:
+            self.engine = runtime.deserialize_cuda_engine(f.read())
+        if self.engine is None:
+            raise RuntimeError(f"No se pudo cargar el engine de TensorRT: {engine_path}")
+        self.context = self.engine.create_execution_context()
+        
+        def torch_dtype(name):
+            return torch.from_numpy(np.empty(0, dtype=trt.nptype(self.engine.get_tensor_dtype(name)))).dtype
+        
+        self.input_dtype = torch_dtype("pixel_values")
+        self.output_dtype = torch_dtype("last_hidden_state")
+    
+    def _run(self, pixel_values: torch.Tensor) -> torch.Tensor:
+        pixel_values = pixel_values.to(self.input_dtype).contiguous()
+        self.context.set_input_shape("pixel_values", tuple(pixel_values.shape))
+        hidden_states = torch.empty(tuple(self.context.get_tensor_shape("last_hidden_state")),
+                                    dtype=self.output_dtype, device=pixel_values.device)
+        self.context.set_tensor_address("pixel_values", pixel_values.data_ptr())
+        self.context.set_tensor_address("last_hidden_state", hidden_states.data_ptr())
+        # Se encola en el stream actual de PyTorch: no hace falta sincronizar
+        if not self.context.execute_async_v3(torch.cuda.current_stream().cuda_stream):
+            raise RuntimeError("Falló la ejecución del engine de TensorRT")
+        return hidden_states
+    
+    def forward(self, pixel_values: torch.Tensor, **kwargs):
+        from transformers.modeling_outputs import BaseModelOutputWithPooling
+        
+        # El engine admite lotes de hasta TRT_MAX_BATCH imágenes
+        hidden_states = torch.cat([self._run(chunk) for chunk in pixel_values.split(TRT_MAX_BATCH)])
+        return BaseModelOutputWithPooling(last_hidden_state=hidden_states)
+
+
+class _VisionEncoderForExport(torch.nn.Module):
+    """
+    Envoltorio del encoder de visión con una única salida tensorial para ONNX.
+    """
+    
+    def __init__(self, encoder: torch.nn.Module):
+        super().__init__()
+        self.encoder = encoder
+    
+    def forward(self, pixel_values: torch.Tensor) -> torch.Tensor:
+        return self.encoder(pixel_values=pixel_values, return_dict=False)[0]
+
+
+def _build_trt_engine(model_name: str, encoder: torch.nn.Module, image_size: dict,
+                      dtype: torch.dtype) -> str:
+    """
+    Exporta el encoder de visión a ONNX y construye un engine de TensorRT con
+    lote dinámico (1..TRT_MAX_BATCH). El engine se guarda en TRT_ENGINE_DIR con
+    una clave por modelo, arquitectura de GPU, versión de TensorRT y precisión,
+    y solo se reconstruye si cambia alguna de ellas.
+    
+    Args:
+        model_name (str): Modelo BLIP (parte de la clave del engine)
+        encoder (torch.nn.Module): Encoder de visión de PyTorch
+        image_size (dict): Tamaño de entrada del procesador ({"height", "width"})
+        dtype (torch.dtype): Precisión del modelo (FP16/BF16 habilitan FP16 en TensorRT)
+    
+    Returns:
+        str: Ruta del engine serializado
+    """
+    import tensorrt as trt
+    
+    major, minor = torch.cuda.get_device_capability()
+    precision = "fp32" if dtype == torch.float32 else "fp16"
+    key = f"{model_name.replace('/', '--')}-sm{major}{minor}-trt{trt.__version__}-{precision}"
+    os.makedirs(TRT_ENGINE_DIR, exist_ok=True)
+    engine_path = os.path.join(TRT_ENGINE_DIR, f"{key}.engine")
+    if os.path.exists(engine_path):
+        return engine_path
+    
+    height, width = image_size["height"], image_size["width"]
+    onnx_path = os.path.join(TRT_ENGINE_DIR, f"{key}.onnx")
+    if not os.path.exists(onnx_path):
+        print(f"Exportando el encoder de visión a ONNX: {onnx_path}")
+        # El export se hace en FP32; la precisión la decide TensorRT al construir
+        export_encoder = _VisionEncoderForExport(encoder).float()
+        dummy = torch.zeros(1, 3, height, width, device=next(encoder.parameters()).device)
+        try:
+            with torch.no_grad():
+                torch.onnx.export(export_encoder, (dummy,), onnx_path, opset_version=17,
+                                  input_names=["pixel_values"], output_names=["last_hidden_state"],
+                                  dynamic_axes={"pixel_values": {0: "batch"}, "last_hidden_state": {0: "batch"}})
+        finally:
+            # El encoder es el del modelo: devolverlo a su precisión aunque falle el export
+            encoder.to(dtype)
+    
+    print(f"Construyendo engine de TensorRT ({precision}): {engine_path}")
+    logger_trt = trt.Logger(trt.Logger.WARNING)
+    builder = trt.Builder(logger_trt)
+    network = builder.create_network(1 << int(trt.NetworkDefinitionCreationFlag.EXPLICIT_BATCH))
+    parser = trt.OnnxParser(network, logger_trt)
+    with open(onnx_path, "rb") as f:
+        if not parser.parse(f.read()):
+            errors = "; ".join(str(parser.get_error(i)) for i in range(parser.num_errors))
+            raise RuntimeError(f"TensorRT no pudo leer el ONNX: {errors}")
+    
+    config = builder.create_builder_config()
+    if precision == "fp16":
+        config.set_flag(trt.BuilderFlag.FP16)
+    profile = builder.create_optimization_profile()
+    profile.set_shape("pixel_values", (1, 3, height, width),
+                      (min(8, TRT_MAX_BATCH), 3, height, width), (TRT_MAX_BATCH, 3, height, width))
+    config.add_optimization_profile(profile)
+    
+    serialized = builder.build_serialized_network(network, config)
+    if serialized is None:
+        raise RuntimeError("TensorRT no pudo construir el engine")
+    with open(engine_path, "wb") as f:
+        f.write(serialized)
+    return engine_path
+
+
+def _load_trt_vision_encoder(model_name: str, model, processor, dtype: torch.dtype) -> Optional[TensorRTVisionEncoder]:
+    """
+    Construye (o reutiliza) el engine de TensorRT del encoder de visión.
+    
+    Returns:
+        TensorRTVisionEncoder | None: None si TensorRT no está disponible o falla
+    """
+    try:
+        import tensorrt  # noqa: F401
+    except ImportError:
+        print("⚠️ TensorRT no está instalado, se usa el encoder de PyTorch")
+        return None
+    
+    try:
+        engine_path = _build_trt_engine(model_name, model.vision_model, processor.image_processor.size, dtype)
+        encoder = TensorRTVisionEncoder(engine_path, model.vision_model)
+        print("✅ Encoder de visión con TensorRT")
+        return encoder
+    except Exception as e:
+        print(f"⚠️ No se pudo usar TensorRT, se usa el encoder de PyTorch: {e}")
+        return None
+
+
+@functools.lru_cache(maxsize=2)
+def _load_blip(model_name: str, device: str, dtype: torch.dtype, use_tensorrt: bool = False,
+               quantize: bool = False):
+    """
+    Carga (una sola vez por combinación modelo/dispositivo/precisión) el
+    procesador y el modelo BLIP. Con use_tensorrt (solo CUDA) el encoder de
+    visión corre en un engine de TensorRT; si no está disponible, en PyTorch.
+    Con quantize (solo CPU en FP32) las capas Linear del encoder y del decoder
+    se cuantizan dinámicamente a INT8 (GEMMs int8 con VNNI/AVX-512).
+    
+    Returns:
+        tuple: (BlipProcessor, BlipForConditionalGeneration)
+    """
+    print("Cargando modelo BLIP...")
+    # use_fast=True para el procesador (corrige advertencia)
+    processor = BlipProcessor.from_pretrained(model_name, use_fast=True)
+    model = BlipForConditionalGeneration.from_pretrained(model_name, torch_dtype=dtype)
+    model.to(device)
+    _freeze(model)
+    # KV cache por defecto en toda llamada a generate, y sin armar salidas que
+    # no se usan (dicts, atenciones, estados ocultos) en cada paso
+    model.config.use_cache = True
+    model.config.output_attentions = False
+    model.config.output_hidden_states = False
+    model.generation_config.return_dict_in_generate = False
+    model.generation_config.output_attentions = False
+    model.generation_config.output_hidden_states = False
+    
+    if quantize and device == "cpu" and dtype == torch.float32:
+        model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        print("✅ BLIP cuantizado a INT8 (CPU)")
+    
+    trt_encoder = None
+    if use_tensorrt and device == "cuda":
+        trt_encoder = _load_trt_vision_encoder(model_name, model, processor, dtype)
+    
+    if trt_encoder is not None:
+        model.vision_model = trt_encoder
+    else:
+        # generate() no se puede compilar entero; se compila el encoder de visión,
+        # que es el paso más costoso de cada caption
+        model.vision_model = _maybe_compile(model.vision_model, device, VISION_COMPILE_MODE)
+    print("✅ Modelo BLIP cargado exitosamente")
+    return processor, model
+
+
+@functools.lru_cache(maxsize=2)
+def _load_translator(device: str, dtype: torch.dtype):
+    """
+    Carga el traductor en-es compartido por las funciones extract_*.
+    Usa CTranslate2 INT8 si está instalado (convirtiendo el modelo la primera vez
+    a CT2_TRANSLATOR_DIR); si no, MarianMT de transformers (MarianTranslator).
+    """
+    print("Cargando modelo de traducción (en-es)...")
+    if importlib.util.find_spec("ctranslate2") is not None:
+        if not os.path.isdir(CT2_TRANSLATOR_DIR):
+            from ctranslate2.converters import TransformersConverter
+            os.makedirs(os.path.dirname(CT2_TRANSLATOR_DIR) or ".", exist_ok=True)
+            print(f"Convirtiendo {TRANSLATOR_MODEL} a CTranslate2 INT8 en {CT2_TRANSLATOR_DIR}...")
+            TransformersConverter(TRANSLATOR_MODEL).convert(CT2_TRANSLATOR_DIR, quantization="int8")
+        
+        translator = CTranslate2Translator(CT2_TRANSLATOR_DIR, device)
+        print("✅ Modelo de traducción cargado (CTranslate2 INT8).")
+    else:
+        translator = MarianTranslator(device, dtype)
+        print("✅ Modelo de traducción cargado.")
+    
+    return translator
+
+
+def _check_output_path(output_path: Optional[str]):
+    """
+    Verifica que output_path se pueda escribir, para fallar antes de cargar
+    modelos y procesar el PDF. No crea ni trunca nada: el archivo (y su
+    directorio) los crea _TextSink recién al escribir.
+    
+    Args:
+        output_path (str, optional): Ruta donde se va a guardar el texto
+    """
+    if not output_path:
+        return
+    path = os.path.abspath(output_path)
+    if os.path.isdir(path):
+        raise IsADirectoryError(f"La salida es un directorio: {output_path}")
+    
+    # El archivo si ya existe; si no, el primer directorio existente de su ruta
+    target = path
+    while not os.path.exists(target):
+        target = os.path.dirname(target)
+    if target != path and not os.path.isdir(target):
+        raise NotADirectoryError(f"No se puede crear {output_path}: {target} no es un directorio")
+    if not os.access(target, os.W_OK):
+        raise PermissionError(f"No se puede escribir en {output_path}")
+
+
+class _TextSink:
+    """
+    Destino del texto extraído página a página: lo escribe en output_path a
+    medida que se genera y solo lo acumula en memoria (en un StringIO, que
+    crece sin mantener un objeto str por página) si se va a devolver.
+    """
+    
+    def __init__(self, output_path: Optional[str], keep_text: bool = True):
+        self.output_path = output_path
+        self.buffer = io.StringIO() if keep_text else None
+        self.file = None
+    
+    def __enter__(self):
+        if self.output_path:
+            directory = os.path.dirname(self.output_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self.file = open(self.output_path, 'w', encoding='utf-8')
+        return self
+    
+    def __exit__(self, *exc_info):
+        if self.file:
+            self.file.close()
+            if exc_info[0] is None:
+                print(f"Texto guardado en: {self.output_path}")
+        return False
+    
+    def write(self, text: str):
+        if self.file:
+            self.file.write(text)
+        if self.buffer is not None:
+            self.buffer.write(text)
+    
+    def getvalue(self) -> str:
+        return self.buffer.getvalue() if self.buffer is not None else ""
+
+
+class BlipPdfExtractor:
+    """
+    Extractor de texto de PDFs con BLIP (+ traductor en-es y OCR opcional).
+    Carga el procesador, el modelo y el traductor una sola vez y los reutiliza
+    en los tres modos de extracción (página a página, flujo continuo y BLIP + OCR).
+    """
+    
+    def __init__(self, model_name: str = DEFAULT_BLIP_MODEL, device: str = "auto",
+                 dtype: Union[str, torch.dtype, None] = None, batch_size: int = 8,
+                 use_tensorrt: bool = False, quantize: Optional[bool] = None):
+        """
+        Args:
+            model_name (str): Modelo BLIP para image captioning
+            device (str): Dispositivo a usar ("auto", "cpu", "cuda")
+            dtype (str | torch.dtype, optional): Precisión ("fp16", "bf16", "fp32";
+                por defecto FP16 en CUDA, FP32 en CPU)
+            batch_size (int): Páginas por lote de captioning/traducción
+            use_tensorrt (bool): Correr el encoder de visión con TensorRT (solo CUDA)
+            quantize (bool, optional): Cuantizar BLIP a INT8 en CPU (por defecto,
+                solo con BLIP_QUANTIZE definida)
+        """
+        # Configurar dispositivo
+        if device == "auto":
+            device = "cuda" if torch.cuda.is_available() else "cpu"
+        
+        self.model_name = model_name
+        self.device = device
+        self.dtype = _select_dtype(device, dtype)
+        if device == "cuda":
+            # Las operaciones que queden en FP32 usan TF32 en los tensor cores
+            torch.set_float32_matmul_precision("high")
+        self.batch_size = batch_size
+        logger.info("Usando dispositivo: %s (%s)", self.device, self.dtype)
+        
+        # Cargar modelo BLIP y Traductor (cacheados entre instancias)
+        if quantize is None:
+            quantize = QUANTIZE_BLIP
+        self.processor, self.model = _load_blip(model_name, self.device, self.dtype, use_tensorrt, quantize)
+        self.translator = _load_translator(self.device, self.dtype)
+        self._warmup()
+        
+        self._ocr_pool = None
+    
+    def _warmup(self):
+        """
+        Pasa un lote de ceros del tamaño del lote por el encoder de visión para
+        que la compilación (torch.compile) no caiga sobre las primeras páginas.
+        Si la compilación (o el engine de TensorRT) falla, se vuelve al encoder
+        original de PyTorch.
+        """
+        if self.device != "cuda":
+            return
+        
+        size = self.processor.image_processor.size
+        dummy = torch.zeros(self.batch_size, 3, size["height"], size["width"],
+                            device=self.device, dtype=self.dtype)
+        try:
+            with torch.inference_mode():
+                self.model.vision_model(pixel_values=dummy)
+        except Exception as e:
+            print(f"⚠️ Falló la compilación del encoder de visión, se usa sin compilar: {e}")
+            self.model.vision_model = getattr(self.model.vision_model, "_orig_mod", self.model.vision_model)
+    
+    @property
+    def ocr_pool(self) -> ThreadPoolExecutor:
+        """
+        Pool de OCR (creado al primer uso). Tesseract corre como subproceso, así
+        que unos pocos hilos bastan para que el OCR (CPU) se solape con BLIP (GPU)
+        sin serializar las imágenes.
+        """
+        if self._ocr_pool is None:
+            self._ocr_pool = ThreadPoolExecutor(max_workers=max(1, (os.cpu_count() or 2) // 2))
+        return self._ocr_pool
+    
+    def page_captions_batch(self, images: List[Union[Image.Image, np.ndarray]]) -> List[str]:
+        """
+        Genera los captions (en español) de un lote de imágenes.
+        
+        Args:
+            images (list): Imágenes PIL o arrays RGB (alto, ancho, 3)
+        
+        Returns:
+            List[str]: Un caption por imagen, en el mismo orden
+        """
+        captions_en = _caption_en_batch(images, self.processor, self.model, self.device)
+        return _translate_batch(captions_en, self.translator)
+    
+    def _captioned_pages(self, pages):
+        return _iter_captioned_pages(pages, self.processor, self.model, self.device,
+                                     self.translator, self.batch_size)
+    
+    @staticmethod
+    def _open_pdf(pdf_path: str):
+        if not os.path.exists(pdf_path):
+            raise FileNotFoundError(f"El archivo PDF no existe: {pdf_path}")
+        return fitz.open(pdf_path)
+    
+    def _iter_page_captions(self, pdf_path: str, dpi: int, skip_text_only_pages: bool,
+                            blip_dpi: Union[int, str]):
+        """
+        Recorrido común de los modos página a página y flujo continuo: abre el
+        PDF, renderiza las páginas en segundo plano (solo para BLIP, a blip_dpi)
+        y genera sus captions por lotes.
+        
+        Yields:
+            tuple: (número de página, texto directo, caption en español)
+        """
+        pdf_document = self._open_pdf(pdf_path)
+        # Solo BLIP consume la imagen: alcanza con renderizar a blip_dpi
+        mat = _blip_render_matrix(dpi, blip_dpi)
+        # No consultar el documento desde este hilo mientras el hilo de render lo usa
+        num_pages = pdf_document.page_count
+        
+        # 1. Texto directo + render de cada página; el lote siguiente se renderiza
+        #    en segundo plano mientras BLIP procesa el actual
+        pages = _iter_rendered_pages(pdf_document, mat, skip_text_only_pages, self.batch_size)
+        # 2. Captions incondicionales con BLIP (y traducción) por lotes de páginas
+        captioned = self._captioned_pages(pages)
+        try:
+            for page_num, page_text, page_image, caption in captioned:
+                logger.info("Procesando página %d/%d", page_num + 1, num_pages)
+                yield page_num, page_text, caption
+        finally:
+            # Cerrar los generadores antes que el documento: así el hilo de
+            # render termina la página en curso antes de que se cierre el PDF
+            captioned.close()
+            pages.close()
+            pdf_document.close()
+    
+    def extract(self, pdf_path: str, output_path: Optional[str] = None, dpi: int = 300,
+                return_text: bool = True, skip_text_only_pages: bool = True,
+                blip_dpi: Union[int, str] = BLIP_DPI) -> str:
+        """
+        Extrae texto de un PDF página a página (texto directo + caption BLIP).
+        Ver extract_text_from_pdf_with_blip para los argumentos.
+        """
+        with _TextSink(output_path, return_text) as sink:
+            for page_num, page_text, caption in self._iter_page_captions(pdf_path, dpi, skip_text_only_pages, blip_dpi):
+                # Combinar texto directo y caption de manera inteligente
+                page_content = combine_text_and_caption(page_text, caption, page_num + 1)
+                
+                if page_content.strip():
+                    sink.write(page_content + "\n\n")  # Separador entre páginas
+        
+        return sink.getvalue()
+    
+    def extract_continuous(self, pdf_path: str, output_path: Optional[str] = None, dpi: int = 300,
+                           return_text: bool = True, skip_text_only_pages: bool = True,
+                           blip_dpi: Union[int, str] = BLIP_DPI) -> str:
+        """
+        Extrae texto de un PDF en flujo continuo (texto directo + caption BLIP).
+        Ver extract_text_continuous_flow_blip para los argumentos.
+        """
+        with _TextSink(output_path, return_text) as sink:
+            first_page = True
+            for page_num, page_text, caption in self._iter_page_captions(pdf_path, dpi, skip_text_only_pages, blip_dpi):
+                # Combinar de manera fluida
+                page_content = create_continuous_text_captions(page_text, caption, page_num + 1)
+                
+                # Limpiar espacios múltiples y normalizar; las páginas se unen con un espacio
+                page_content = normalize_text_flow(page_content)
+                if page_content:
+                    sink.write(page_content if first_page else " " + page_content)
+                    first_page = False
+        
+        return sink.getvalue()
+    
+    def extract_with_ocr(self, pdf_path: str, output_path: Optional[str] = None,
+                         ocr_languages: str = 'spa+eng', dpi: int = 300,
+                         return_text: bool = True, skip_text_only_pages: bool = True) -> str:
+        """
+        Extrae texto de un PDF combinando descripción BLIP y transcripción OCR.
+        Ver extract_text_with_blip_and_ocr para los argumentos.
+        """
+        pdf_document = self._open_pdf(pdf_path)
+        
+        mat = fitz.Matrix(dpi/72, dpi/72)
+        num_pages = pdf_document.page_count
+        ocr_pool = self.ocr_pool
+        
+        # 1-2. Texto directo + render de cada página (en segundo plano)
+        rendered = _iter_rendered_pages(pdf_document, mat, skip_text_only_pages, self.batch_size)
+        # El OCR de cada página se lanza apenas se renderiza (a DPI completo),
+        # antes de BLIP, que recibe una versión reducida de la misma imagen
+        pages = ((page_num, page_text, _downscale_for_blip(page_image),
+                  ocr_pool.submit(_ocr_image, page_image, ocr_languages))
+                 if page_image is not None else (page_num, page_text, page_image, None)
+                 for page_num, page_text, page_image in rendered)
+        # 3. Descripciones con BLIP (y traducción) por lotes de páginas
+        captioned = self._captioned_pages(pages)
+        try:
+            with _TextSink(output_path, return_text) as sink:
+                for page_num, page_text, page_image, ocr_future, description in captioned:
+                    logger.info("Procesando página %d/%d", page_num + 1, num_pages)
+                    
+                    # 4. Recoger el texto del OCR (ya en curso mientras corría BLIP)
+                    try:
+                        ocr_text = ocr_future.result() if ocr_future else ""
+                    except Exception as e:
+                        print(f"  > Error en OCR página {page_num + 1}: {e}")
+                        ocr_text = ""
+                    
+                    # 5. Combinar resultados en el formato solicitado
+                    page_content = combine_description_and_ocr(page_text, description, ocr_text, page_num + 1)
+                    
+                    if page_content.strip():
+                        sink.write(page_content + "\n\n")  # Separador entre páginas
+        finally:
+            # Igual que en _iter_page_captions: cerrar los generadores antes que
+            # el documento, para que el hilo de render ya no lo use
+            captioned.close()
+            pages.close()
+            rendered.close()
+            pdf_document.close()
+        
+        return sink.getvalue()
+
+
+@functools.lru_cache(maxsize=2)
+def get_extractor(model_name: str = DEFAULT_BLIP_MODEL, device: str = "auto",
+                  batch_size: int = 8, dtype: Optional[str] = None,
+                  use_tensorrt: bool = False, quantize: Optional[bool] = None) -> BlipPdfExtractor:
+    """
+    Devuelve un BlipPdfExtractor compartido por combinación de argumentos.
+    """
+    return BlipPdfExtractor(model_name, device, dtype=dtype, batch_size=batch_size,
+                            use_tensorrt=use_tensorrt, quantize=quantize)
 
 
 def extract_text_from_pdf_with_blip(pdf_path: str, 
                                       output_path: Optional[str] = None,
-                                      model_name: str = "Salesforce/blip-image-captioning-base",
+                                      model_name: str = DEFAULT_BLIP_MODEL,
                                       dpi: int = 300,
-                                      device: str = "auto") -> str:
+                                      device: str = "auto",
+                                      batch_size: int = 8,
+                                      return_text: bool = True,
+                                      skip_text_only_pages: bool = True,
+                                      blip_dpi: Union[int, str] = BLIP_DPI,
+                                      dtype: Optional[str] = None,
+                                      use_tensorrt: bool = False,
+                                      quantize: Optional[bool] = None) -> str:
     """
     Extrae texto de un PDF usando BLIP directamente. (MODO PÁGINA A PÁGINA)
     
@@ -27,8 +750,22 @@ def extract_text_from_pdf_with_blip(pdf_path: str,
         pdf_path (str): Ruta al archivo PDF
         output_path (str, optional): Ruta donde guardar el texto extraído
         model_name (str): Modelo BLIP para image captioning
-        dpi (int): DPI para renderizar las páginas del PDF
+        dpi (int): DPI máximo para renderizar las páginas del PDF
         device (str): Dispositivo a usar ("auto", "cpu", "cuda")
+        batch_size (int): Páginas por lote de captioning/traducción
+        return_text (bool): Si es False no se acumula el texto en memoria
+            (solo se escribe en output_path) y se devuelve ""
+        skip_text_only_pages (bool): No renderizar ni describir las páginas con
+            texto abundante y sin imágenes (se usa solo su texto directo)
+        blip_dpi (int | str): DPI de render para BLIP; no afecta la calidad del caption
+            porque BLIP redimensiona la imagen a su resolución nativa. Con "auto"
+            se calcula por página según su tamaño (el texto directo no depende del DPI)
+        dtype (str, optional): Precisión de los modelos ("fp16", "bf16", "fp32");
+            por defecto FP16 en CUDA y FP32 en CPU
+        use_tensorrt (bool): Correr el encoder de visión de BLIP con TensorRT
+            (solo CUDA; el engine se construye la primera vez y se cachea)
+        quantize (bool, optional): Cuantizar BLIP a INT8 dinámico (solo en CPU
+            y en FP32); por defecto solo con BLIP_QUANTIZE definida
     
     Returns:
         str: Texto extraído del PDF
@@ -37,96 +774,306 @@ def extract_text_from_pdf_with_blip(pdf_path: str,
     if not os.path.exists(pdf_path):
         raise FileNotFoundError(f"El archivo PDF no existe: {pdf_path}")
     
-    print(f"Procesando PDF con BLIP: {pdf_path}")
-    print(f"Modelo: {model_name}")
-    print(f"DPI: {dpi}")
-    print(f"Dispositivo: {device}")
-    
-    # Configurar dispositivo
-    if device == "auto":
-        device = "cuda" if torch.cuda.is_available() else "cpu"
+    # Fallar rápido si la salida no se puede escribir (antes de cargar BLIP)
+    _check_output_path(output_path)
     
-    print(f"Usando dispositivo: {device}")
+    logger.info("Procesando PDF con BLIP: %s (modelo: %s, DPI: %s, dispositivo: %s)",
+                pdf_path, model_name, dpi, device)
     
-    # Cargar modelo BLIP y Traductor
-    print("Cargando modelo BLIP...")
-    translator = None
     try:
-        # Arreglo 1: Usar use_fast=True para el procesador (corrige advertencia)
-        processor = BlipProcessor.from_pretrained(model_name, use_fast=True)
-        
-        # Arreglo 2: Cargar modelo (sin force_download, ya que el caché está limpio/fijo)
-        model = BlipForConditionalGeneration.from_pretrained(model_name)
-        model.to(device)
-        print("✅ Modelo BLIP cargado exitosamente")
-
-        # NUEVO: Cargar modelo de traducción
-        print("Cargando modelo de traducción (en-es)...")
-        translator = pipeline("translation_en_to_es", 
-                              model="Helsinki-NLP/opus-mt-en-es",
-                              device=device) # Usar GPU si está disponible
-        print("✅ Modelo de traducción cargado.")
-        
+        extractor = get_extractor(model_name, device, batch_size, dtype, use_tensorrt, quantize)
     except Exception as e:
         print(f"❌ Error cargando modelos: {e}")
         return ""
     
-    # Abrir el PDF
-    pdf_document = fitz.open(pdf_path)
-    all_text = []
+    return extractor.extract(pdf_path, output_path, dpi, return_text, skip_text_only_pages, blip_dpi)
+
+
+def _auto_blip_matrix(page, max_dpi: int):
+    """
+    Matriz de render para que el lado menor de la página quede en ~1.5x
+    BLIP_INPUT_SIDE píxeles (entre 72 DPI y max_dpi).
+    """
+    dpi = BLIP_INPUT_SIDE * 1.5 / min(page.rect.width, page.rect.height) * 72
+    dpi = min(max(72, dpi), max_dpi)
+    return fitz.Matrix(dpi/72, dpi/72)  # 72 es el DPI por defecto
+
+
+def _blip_render_matrix(dpi: int, blip_dpi: Union[int, str]):
+    """
+    Matriz de render para las imágenes que solo consume BLIP: fija a
+    min(dpi, blip_dpi), o una función página -> matriz si blip_dpi es "auto".
+    """
+    if blip_dpi == "auto":
+        return functools.partial(_auto_blip_matrix, max_dpi=dpi)
+    render_dpi = min(dpi, blip_dpi)
+    return fitz.Matrix(render_dpi/72, render_dpi/72)  # 72 es el DPI por defecto
+
+
+def _render_page(page, mat) -> np.ndarray:
+    """
+    Renderiza una página directamente a un array RGB de NumPy, sin pasar por
+    una codificación/decodificación PNG intermedia.
     
-    for page_num in range(len(pdf_document)):
-        print(f"Procesando página {page_num + 1}/{len(pdf_document)}")
-        
-        page = pdf_document[page_num]
-        
-        # 1. Extraer texto directo del PDF (si existe)
+    Args:
+        page: Página de PyMuPDF
+        mat: Matriz de transformación (escala según DPI), o una función
+            página -> matriz para elegir la resolución según la página
+    
+    Returns:
+        np.ndarray: Imagen RGB de forma (alto, ancho, 3)
+    """
+    if callable(mat):
+        mat = mat(page)
+    pix = page.get_pixmap(matrix=mat, alpha=False)
+    # pix.samples es una copia en bytes: el pixmap nativo se libera enseguida
+    image = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width, 3)
+    del pix
+    return image
+
+
+def _is_text_only_page(page, page_text: str) -> bool:
+    """
+    Heurística para páginas de solo texto: mucho texto directo y ninguna imagen
+    incrustada. En ellas BLIP/OCR no aportan nada sobre el texto del PDF.
+    
+    Args:
+        page: Página de PyMuPDF
+        page_text (str): Texto directo de la página
+    
+    Returns:
+        bool: True si la página puede saltearse
+    """
+    return len(page_text.strip()) > TEXT_ONLY_MIN_CHARS and not page.get_images(full=False)
+
+
+def _downscale_for_blip(image: np.ndarray) -> np.ndarray:
+    """
+    Reduce una página renderizada a BLIP_MAX_SIDE píxeles en su lado mayor.
+    BLIP redimensiona igual a su resolución nativa, así que el caption no cambia
+    y se evita preprocesar/copiar una imagen de alta resolución.
+    """
+    height, width = image.shape[:2]
+    scale = BLIP_MAX_SIDE / max(height, width)
+    if scale >= 1:
+        return image
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    return np.asarray(Image.fromarray(image).resize(size, Image.BILINEAR))
+
+
+def _iter_rendered_pages(pdf_document, mat, skip_text_only_pages: bool = False, prefetch: int = 2):
+    """
+    Recorre el PDF devolviendo (page_num, page_text, page_image) por página.
+    Las `prefetch` páginas siguientes se renderizan en un hilo de fondo mientras
+    el llamador procesa la actual, de modo que el render en CPU se solapa con la
+    inferencia en GPU. PyMuPDF no es thread-safe, así que todo acceso al
+    documento ocurre en ese único hilo de render.
+    
+    Como es un generador, en memoria solo viven las imágenes que el llamador
+    retiene (p. ej. un lote) más las `prefetch` ya renderizadas, sin importar
+    el largo del PDF.
+    
+    Args:
+        pdf_document: Documento de PyMuPDF
+        mat: Matriz de transformación (o función página -> matriz, ver _render_page)
+        skip_text_only_pages (bool): No renderizar las páginas de solo texto
+        prefetch (int): Páginas renderizadas por adelantado
+    
+    Yields:
+        tuple: (número de página, texto directo, imagen RGB o None si se salteó)
+    """
+    # Iterar el documento (en vez de indexarlo) desde el único hilo de render
+    page_iter = iter(pdf_document)
+    
+    def load_page():
+        page = next(page_iter)
         page_text = page.get_text()
-        
-        # 2. Generar caption incondicional de la página usando BLIP
-        mat = fitz.Matrix(dpi/72, dpi/72)  # 72 es el DPI por defecto
-        pix = page.get_pixmap(matrix=mat)
-        img_data = pix.tobytes("png")
-        
-        # Convertir a PIL Image
-        pil_image = Image.open(io.BytesIO(img_data))
-        
-        # Generar caption incondicional con BLIP (y traducir)
-        try:
-            # NUEVO: Pasar el 'translator'
-            caption = generate_unconditional_caption(pil_image, processor, model, device, translator)
-        except Exception as e:
-            print(f"  > Error generando caption página {page_num + 1}: {e}")
-            caption = ""
-        
-        # Combinar texto directo y caption de manera inteligente
-        page_content = combine_text_and_caption(page_text, caption, page_num + 1)
-        
-        if page_content.strip():
-            all_text.append(page_content)
-            all_text.append("\n\n")  # Separador entre páginas
+        if skip_text_only_pages and _is_text_only_page(page, page_text):
+            return page_text, None
+        return page_text, _render_page(page, mat)
+    
+    num_pages = pdf_document.page_count
+    if num_pages == 0:
+        return
+    
+    with ThreadPoolExecutor(max_workers=1) as render_pool:
+        pending = deque(render_pool.submit(load_page) for _ in range(min(max(1, prefetch), num_pages)))
+        submitted = len(pending)
+        for page_num in range(num_pages):
+            page_text, page_image = pending.popleft().result()
+            if submitted < num_pages:
+                pending.append(render_pool.submit(load_page))
+                submitted += 1
+            yield page_num, page_text, page_image
+
+
+@functools.lru_cache(maxsize=1)
+def _copy_stream():
+    """
+    Stream CUDA dedicado a las copias host->device.
+    """
+    return torch.cuda.Stream()
+
+
+# Buffers pinned reutilizados entre lotes, por (forma sin el lote, dtype):
+# reservar memoria pinned (cudaHostAlloc) en cada lote es más caro que la copia
+_pinned_buffers = {}
+
+
+def _copy_pinned(tensor: torch.Tensor, device: str, stream) -> torch.Tensor:
+    """
+    Copia un tensor de CPU al dispositivo pasando por un buffer pinned
+    reutilizable, de forma asíncrona en `stream`. El buffer crece si llega un
+    lote más grande; antes de sobrescribirlo se espera a que termine la copia
+    anterior que lo leía.
+    """
+    key = (tuple(tensor.shape[1:]), tensor.dtype)
+    buffer, done = _pinned_buffers.get(key, (None, None))
+    if buffer is None or buffer.shape[0] < tensor.shape[0]:
+        buffer = torch.empty(tensor.shape, dtype=tensor.dtype, pin_memory=True)
+    elif done is not None:
+        done.synchronize()
+    
+    staging = buffer[:tensor.shape[0]]
+    staging.copy_(tensor)
+    with torch.cuda.stream(stream):
+        result = staging.to(device, non_blocking=True)
+        done = torch.cuda.Event()
+        done.record(stream)
+    _pinned_buffers[key] = (buffer, done)
+    return result
+
+
+def _inputs_to_device(inputs: dict, device: str, dtype: torch.dtype) -> dict:
+    """
+    Mueve las entradas del procesador al dispositivo, modificando el
+    diccionario en el lugar. Los pixel_values se castean a `dtype` en CPU antes
+    de copiar (en uint8 o FP16 se transfieren menos bytes que en FP32).
+    En CUDA la copia usa memoria pinned (un buffer reutilizado entre lotes) y
+    un stream dedicado (non_blocking) para que el DMA se solape con el cómputo
+    del stream por defecto.
     
-    pdf_document.close()
+    Args:
+        inputs (dict): Entradas para model.generate (tensores de CPU)
+        device (str): Dispositivo destino
+        dtype (torch.dtype): dtype en el que se copian los pixel_values
     
-    # Combinar todo el texto
-    full_text = "".join(all_text)
+    Returns:
+        dict: Entradas en el dispositivo
+    """
+    inputs["pixel_values"] = inputs["pixel_values"].to(dtype)
+    
+    if device != "cuda":
+        for key, tensor in inputs.items():
+            inputs[key] = tensor.to(device)
+        return inputs
+    
+    stream = _copy_stream()
+    for key, tensor in inputs.items():
+        inputs[key] = _copy_pinned(tensor, device, stream)
+    current = torch.cuda.current_stream()
+    current.wait_stream(stream)
+    for tensor in inputs.values():
+        tensor.record_stream(current)
+    return inputs
+
+
+@functools.lru_cache(maxsize=4)
+def _pixel_affine(mean: tuple, std: tuple, device: str, dtype: torch.dtype):
+    """
+    Constantes de normalización de BLIP ya en el dispositivo, como una
+    transformación afín sobre píxeles uint8: x * scale + shift.
+    
+    Returns:
+        tuple: (scale, shift), tensores de forma (1, 3, 1, 1)
+    """
+    mean = torch.tensor(mean, dtype=torch.float32).view(1, 3, 1, 1)
+    std = torch.tensor(std, dtype=torch.float32).view(1, 3, 1, 1)
+    scale = (1 / (255 * std)).to(device=device, dtype=dtype)
+    shift = (-mean / std).to(device=device, dtype=dtype)
+    return scale, shift
+
+
+def _caption_en_batch(images: List[Union[Image.Image, np.ndarray]], processor, model, device: str) -> List[str]:
+    """
+    Genera captions en inglés para un lote de imágenes con una sola llamada a generate.
+    
+    Args:
+        images (list): Imágenes PIL o arrays RGB (alto, ancho, 3)
+        processor: BlipProcessor
+        model: BlipForConditionalGeneration
+        device (str): Dispositivo a usar
+    
+    Returns:
+        List[str]: Un caption en inglés por imagen, en el mismo orden
+    """
+    # Asegurar que las imágenes estén en RGB (los arrays de _render_page ya lo están)
+    images = [image.convert('RGB') if isinstance(image, Image.Image) and image.mode != 'RGB' else image
+              for image in images]
+    
+    # Captioning incondicional: solo pixel_values, sin pasar por el tokenizer.
+    # En CPU solo se redimensiona; el reescalado y la normalización se hacen en
+    # el dispositivo, así que se copian bytes uint8 (la mitad que en FP16)
+    image_processor = processor.image_processor
+    pixel_values = image_processor(images, do_rescale=False, do_normalize=False,
+                                   return_tensors="pt")["pixel_values"]
+    if pixel_values.is_floating_point():
+        pixel_values = pixel_values.round_().clamp_(0, 255)
+    inputs = _inputs_to_device({'pixel_values': pixel_values}, device, torch.uint8)
+    
+    scale, shift = _pixel_affine(tuple(image_processor.image_mean), tuple(image_processor.image_std),
+                                 device, model.dtype)
+    # (x / 255 - mean) / std en una sola operación
+    inputs['pixel_values'] = torch.addcmul(shift, inputs['pixel_values'].to(model.dtype), scale)
+    
+    with torch.inference_mode(), _autocast(device, model.dtype):
+        # Decodificación greedy de un solo beam con KV cache; 20 tokens alcanzan
+        # para un caption incondicional
+        out = model.generate(**inputs, max_new_tokens=20, num_beams=1, do_sample=False, use_cache=True)
+    
+    return [caption.strip() for caption in processor.batch_decode(out, skip_special_tokens=True)]
+
+
+def _translate_batch(captions_en: List[str], translator_pipeline) -> List[str]:
+    """
+    Traduce un lote de captions al español con una sola llamada al traductor.
+    
+    Args:
+        captions_en (List[str]): Captions en inglés (pueden estar vacíos)
+        translator_pipeline: Traductor en-es (o None)
+    
+    Returns:
+        List[str]: Captions en ESPAÑOL (o inglés con prefijo si falla)
+    """
+    # Ordenar por longitud (descendente) para que cada sub-lote del traductor
+    # tenga captions de largo parecido y poco padding; luego se restaura el orden
+    order = sorted((i for i, caption in enumerate(captions_en) if caption),
+                   key=lambda i: len(captions_en[i]), reverse=True)
+    fallback = [f"[EN] {caption}" if caption else "" for caption in captions_en]
+    
+    if not order:
+        return ["" for _ in captions_en]
+    if not translator_pipeline:
+        return fallback  # Devolver en inglés si no hay traductor
     
-    # Guardar si se especifica output_path
-    if output_path:
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(full_text)
-        print(f"Texto guardado en: {output_path}")
+    try:
+        translations = translator_pipeline([captions_en[i] for i in order], batch_size=16, max_length=60)
+    except Exception as e:
+        print(f"  > Error traduciendo lote de {len(order)} captions: {e}")
+        return fallback  # Devolver en inglés si falla la traducción
     
-    return full_text
+    captions_es = ["" for _ in captions_en]
+    for i, translation in zip(order, translations):
+        captions_es[i] = translation['translation_text'].strip()
+    return captions_es
 
 
-def generate_unconditional_caption(image: Image.Image, processor, model, device: str, translator_pipeline) -> str:
+def generate_unconditional_caption(image: Union[Image.Image, np.ndarray], processor, model, device: str, translator_pipeline) -> str:
     """
     Genera un caption incondicional para una imagen usando BLIP y lo traduce al español.
     
     Args:
-        image (Image.Image): Imagen PIL
+        image (Image.Image | np.ndarray): Imagen PIL o array RGB (alto, ancho, 3)
         processor: BlipProcessor
         model: BlipForConditionalGeneration
         device (str): Dispositivo a usar
@@ -136,39 +1083,146 @@ def generate_unconditional_caption(image: Image.Image, processor, model, device:
         str: Caption generado en ESPAÑOL (o inglés con prefijo si falla)
     """
     
+    return generate_unconditional_captions_batch([image], processor, model, device, translator_pipeline)[0]
+
+
+def generate_unconditional_captions_batch(images: List[Union[Image.Image, np.ndarray]], processor, model,
+                                          device: str, translator_pipeline=None) -> List[str]:
+    """
+    Genera captions incondicionales para un lote de imágenes con una sola
+    llamada a BLIP y una sola llamada al traductor.
+    
+    Args:
+        images (list): Imágenes PIL o arrays RGB (alto, ancho, 3)
+        processor: BlipProcessor
+        model: BlipForConditionalGeneration
+        device (str): Dispositivo a usar
+        translator_pipeline: Traductor en-es (o None)
+    
+    Returns:
+        List[str]: Un caption en ESPAÑOL por imagen (o inglés con prefijo si
+            falla la traducción; vacío si falla BLIP), en el mismo orden
+    """
+    if not images:
+        return []
+    
     try:
-        # Asegurar que la imagen esté en RGB
-        if image.mode != 'RGB':
-            image = image.convert('RGB')
-        
-        # --- 1. Generar caption en INGLÉS ---
-        inputs = processor(image, return_tensors="pt")
-        inputs = {k: v.to(device) for k, v in inputs.items()}
-        
-        with torch.no_grad():
-            # max_length más corto para captions más concisos
-            out = model.generate(**inputs, max_length=50) 
+        captions_en = _caption_en_batch(images, processor, model, device)
+    except Exception as e:
+        print(f"  > Error generando captions: {e}")
+        return ["" for _ in images]
+    
+    return _translate_batch(captions_en, translator_pipeline)
+
+
+def _image_key(image: Union[Image.Image, np.ndarray], model) -> bytes:
+    """
+    Huella de una página renderizada: blake2b de todos los píxeles (y su
+    forma) más el nombre del modelo BLIP.
+    """
+    pixels = np.ascontiguousarray(np.asarray(image))
+    digest = hashlib.blake2b(str(pixels.shape).encode(), digest_size=16)
+    digest.update(memoryview(pixels).cast("B"))
+    digest.update(str(getattr(model, "name_or_path", "")).encode())
+    return digest.digest()
+
+
+def _cached_captions(keys: List[bytes]) -> dict:
+    """
+    Devuelve {key: caption} para las huellas presentes en la cache.
+    """
+    found = {}
+    with _caption_cache_lock:
+        for key in keys:
+            if key in _caption_cache:
+                _caption_cache.move_to_end(key)
+                found[key] = _caption_cache[key]
+    return found
+
+
+def _store_captions(captions: dict):
+    """
+    Guarda {key: caption} en la cache, descartando las entradas más antiguas.
+    """
+    with _caption_cache_lock:
+        for key, caption in captions.items():
+            _caption_cache[key] = caption
+            _caption_cache.move_to_end(key)
+        while len(_caption_cache) > CAPTION_CACHE_SIZE:
+            _caption_cache.popitem(last=False)
+
+
+def _iter_captioned_pages(pages, processor, model, device: str, translator_pipeline, batch_size: int):
+    """
+    Agrupa las páginas en lotes de batch_size y genera sus captions con una sola
+    llamada a BLIP y una sola llamada al traductor por lote. Solo se retienen
+    batch_size imágenes a la vez. Las páginas sin imagen (salteadas) pasan con
+    caption vacío, respetando el orden, y las páginas visualmente idénticas a
+    otras ya procesadas reutilizan su caption desde la cache.
+    
+    Args:
+        pages: Iterable de (page_num, page_text, page_image, *extra)
+        processor: BlipProcessor
+        model: BlipForConditionalGeneration
+        device (str): Dispositivo a usar
+        translator_pipeline: Traductor en-es (o None)
+        batch_size (int): Páginas por lote
+    
+    Yields:
+        tuple: (número de página, texto directo, imagen RGB, *extra, caption en español)
+    """
+    def caption_batch(batch):
+        keys = [_image_key(page[2], model) if page[2] is not None else None for page in batch]
+        captions = _cached_captions([key for key in keys if key is not None])
         
-        # Decodificar el resultado en INGLÉS
-        caption_en = processor.decode(out[0], skip_special_tokens=True).strip()
+        # Solo pasan por BLIP las imágenes no vistas (una vez por huella)
+        missing = {}
+        for page, key in zip(batch, keys):
+            if key is not None and key not in captions and key not in missing:
+                missing[key] = page[2]
         
-        # --- 2. Traducir a ESPAÑOL ---
-        if translator_pipeline and caption_en:
+        if missing:
             try:
-                # El traductor devuelve una lista, tomamos el primer elemento
-                translation = translator_pipeline(caption_en, max_length=100) # Añadir max_length aquí también
-                caption_es = translation[0]['translation_text']
-                # print(f"  > EN: '{caption_en}' -> ES: '{caption_es}'") # Descomentar para debug
-                return caption_es.strip()
+                captions_en = _caption_en_batch(list(missing.values()), processor, model, device)
             except Exception as e:
-                print(f"  > Error traduciendo '{caption_en}': {e}")
-                return f"[EN] {caption_en}" # Devolver en inglés si falla la traducción
-        else:
-            return f"[EN] {caption_en}" # Devolver en inglés si no hay traductor
+                print(f"  > Error generando captions páginas {batch[0][0] + 1}-{batch[-1][0] + 1}: {e}")
+                captions_en = [""] * len(missing)
             
-    except Exception as e:
-        print(f"  > Error generando caption: {e}")
-        return ""
+            new_captions = dict(zip(missing, _translate_batch(captions_en, translator_pipeline)))
+            captions.update(new_captions)
+            # No cachear fallos (captions vacíos) para reintentarlos más adelante
+            _store_captions({key: caption for key, caption in new_captions.items() if caption})
+        
+        for page, key in zip(batch, keys):
+            yield (*page, captions[key] if key is not None else "")
+    
+    batch = []
+    num_images = 0
+    for page in pages:
+        batch.append(page)
+        num_images += page[2] is not None
+        if num_images >= batch_size:
+            yield from caption_batch(batch)
+            batch = []
+            num_images = 0
+    
+    if batch:
+        yield from caption_batch(batch)
+
+
+def _ocr_image(image: Union[Image.Image, np.ndarray], ocr_languages: str) -> str:
+    """
+    Transcribe una imagen con Tesseract (se ejecuta en el pool de OCR).
+    pytesseract pasa la imagen a tesseract a través de un archivo temporal
+    (PNG por defecto); el array se envuelve sin copiar y se marca como BMP para
+    que ese archivo se escriba sin compresión.
+    """
+    if pytesseract is None:
+        raise ImportError("pytesseract no está instalado")
+    if isinstance(image, np.ndarray):
+        image = Image.fromarray(image)
+        image.format = "BMP"
+    return pytesseract.image_to_string(image, lang=ocr_languages)
 
 
 def combine_text_and_caption(direct_text: str, caption: str, page_num: int) -> str:
@@ -211,14 +1265,23 @@ def combine_text_and_caption(direct_text: str, caption: str, page_num: int) -> s
     return ""
 
 
-def is_similar_content(text1: str, text2: str, threshold: float = 0.5) -> bool:
+def _word_set(text: str) -> frozenset:
+    """
+    Conjunto de palabras (en minúsculas, separadas por espacios) de un texto.
+    """
+    return frozenset(text.lower().split())
+
+
+def is_similar_content(text1: Union[str, frozenset], text2: Union[str, frozenset], threshold: float = 0.5) -> bool:
     """
     Verifica si dos textos son similares (Jaccard similarity).
     Umbral bajo (0.5) porque el caption puede ser muy diferente al texto.
+    Acepta conjuntos precalculados con _word_set para no re-tokenizar el
+    mismo texto en comparaciones sucesivas.
     
     Args:
-        text1 (str): Primer texto
-        text2 (str): Segundo texto
+        text1 (str | frozenset): Primer texto o su conjunto de palabras
+        text2 (str | frozenset): Segundo texto o su conjunto de palabras
         threshold (float): Umbral de similitud
     
     Returns:
@@ -228,25 +1291,32 @@ def is_similar_content(text1: str, text2: str, threshold: float = 0.5) -> bool:
         return False
     
     # Normalizar textos
-    words1 = set(text1.lower().split())
-    words2 = set(text2.lower().split())
+    words1 = text1 if isinstance(text1, frozenset) else _word_set(text1)
+    words2 = text2 if isinstance(text2, frozenset) else _word_set(text2)
     
     if not words1 or not words2:
         return False
     
     # Calcular intersección
-    intersection = words1.intersection(words2)
-    union = words1.union(words2)
+    intersection = len(words1 & words2)
+    union = len(words1) + len(words2) - intersection
     
-    similarity = len(intersection) / len(union) if union else 0.0
+    similarity = intersection / union if union else 0.0
     return similarity >= threshold
 
 
 def extract_text_continuous_flow_blip(pdf_path: str, 
                                           output_path: Optional[str] = None,
-                                          model_name: str = "Salesforce/blip-image-captioning-base",
+                                          model_name: str = DEFAULT_BLIP_MODEL,
                                           dpi: int = 300,
-                                          device: str = "auto") -> str:
+                                          device: str = "auto",
+                                          batch_size: int = 8,
+                                          return_text: bool = True,
+                                          skip_text_only_pages: bool = True,
+                                          blip_dpi: Union[int, str] = BLIP_DPI,
+                                          dtype: Optional[str] = None,
+                                          use_tensorrt: bool = False,
+                                          quantize: Optional[bool] = None) -> str:
     """
     Extrae texto de un PDF en flujo continuo usando BLIP (y traduce a español).
     
@@ -254,8 +1324,22 @@ def extract_text_continuous_flow_blip(pdf_path: str,
         pdf_path (str): Ruta al archivo PDF
         output_path (str, optional): Ruta donde guardar el texto extraído
         model_name (str): Modelo BLIP para image captioning
-        dpi (int): DPI para renderizar las páginas del PDF
+        dpi (int): DPI máximo para renderizar las páginas del PDF
         device (str): Dispositivo a usar
+        batch_size (int): Páginas por lote de captioning/traducción
+        return_text (bool): Si es False no se acumula el texto en memoria
+            (solo se escribe en output_path) y se devuelve ""
+        skip_text_only_pages (bool): No renderizar ni describir las páginas con
+            texto abundante y sin imágenes (se usa solo su texto directo)
+        blip_dpi (int | str): DPI de render para BLIP; no afecta la calidad del caption
+            porque BLIP redimensiona la imagen a su resolución nativa. Con "auto"
+            se calcula por página según su tamaño (el texto directo no depende del DPI)
+        dtype (str, optional): Precisión de los modelos ("fp16", "bf16", "fp32");
+            por defecto FP16 en CUDA y FP32 en CPU
+        use_tensorrt (bool): Correr el encoder de visión de BLIP con TensorRT
+            (solo CUDA; el engine se construye la primera vez y se cachea)
+        quantize (bool, optional): Cuantizar BLIP a INT8 dinámico (solo en CPU
+            y en FP32); por defecto solo con BLIP_QUANTIZE definida
     
     Returns:
         str: Texto extraído del PDF en flujo continuo
@@ -264,94 +1348,19 @@ def extract_text_continuous_flow_blip(pdf_path: str,
     if not os.path.exists(pdf_path):
         raise FileNotFoundError(f"El archivo PDF no existe: {pdf_path}")
     
-    print(f"Procesando PDF en flujo continuo con BLIP: {pdf_path}")
-    print(f"Modelo: {model_name}")
-    print(f"DPI: {dpi}")
-    print(f"Dispositivo: {device}")
-    
-    # Configurar dispositivo
-    if device == "auto":
-        device = "cuda" if torch.cuda.is_available() else "cpu"
+    # Fallar rápido si la salida no se puede escribir (antes de cargar BLIP)
+    _check_output_path(output_path)
     
-    print(f"Usando dispositivo: {device}")
+    logger.info("Procesando PDF en flujo continuo con BLIP: %s (modelo: %s, DPI: %s, dispositivo: %s)",
+                pdf_path, model_name, dpi, device)
     
-    # Cargar modelo BLIP y Traductor
-    print("Cargando modelo BLIP...")
-    translator = None
     try:
-        # Arreglo 1: Usar use_fast=True para el procesador (corrige advertencia)
-        processor = BlipProcessor.from_pretrained(model_name, use_fast=True)
-        
-        # Arreglo 2: Cargar modelo
-        model = BlipForConditionalGeneration.from_pretrained(model_name)
-        model.to(device)
-        print("✅ Modelo BLIP cargado exitosamente")
-
-        # NUEVO: Cargar modelo de traducción
-        print("Cargando modelo de traducción (en-es)...")
-        translator = pipeline("translation_en_to_es", 
-                              model="Helsinki-NLP/opus-mt-en-es",
-                              device=device) # Usar GPU si está disponible
-        print("✅ Modelo de traducción cargado.")
-        
+        extractor = get_extractor(model_name, device, batch_size, dtype, use_tensorrt, quantize)
     except Exception as e:
         print(f"❌ Error cargando modelos: {e}")
         return ""
     
-    # Abrir el PDF
-    pdf_document = fitz.open(pdf_path)
-    all_text = []
-    
-    for page_num in range(len(pdf_document)):
-        print(f"Procesando página {page_num + 1}/{len(pdf_document)}")
-        
-        page = pdf_document[page_num]
-        
-        # 1. Extraer texto directo del PDF
-        page_text = page.get_text()
-        
-        # 2. Generar caption incondicional de la página usando BLIP
-        mat = fitz.Matrix(dpi/72, dpi/72)
-        pix = page.get_pixmap(matrix=mat)
-        img_data = pix.tobytes("png")
-        
-        pil_image = Image.open(io.BytesIO(img_data))
-        
-        # Generar caption incondicional con BLIP (y traducir)
-        try:
-            # NUEVO: Pasar el 'translator'
-            caption = generate_unconditional_caption(pil_image, processor, model, device, translator)
-        except Exception as e:
-            print(f"  > Error generando caption página {page_num + 1}: {e}")
-            caption = ""
-        
-        # Combinar de manera fluida
-        page_content = create_continuous_text_captions(page_text, caption, page_num + 1)
-        
-        if page_content.strip():
-            all_text.append(page_content)
-            # Solo agregar separador si no termina en punto
-            if not page_content.strip().endswith(('.', '!', '?', ':')):
-                all_text.append(" ")
-            else:
-                all_text.append(" ")
-    
-    pdf_document.close()
-    
-    # Combinar todo el texto en flujo continuo
-    full_text = "".join(all_text)
-    
-    # Limpiar espacios múltiples y normalizar
-    full_text = normalize_text_flow(full_text)
-    
-    # Guardar si se especifica output_path
-    if output_path:
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(full_text)
-        print(f"Texto guardado en: {output_path}")
-    
-    return full_text
+    return extractor.extract_continuous(pdf_path, output_path, dpi, return_text, skip_text_only_pages, blip_dpi)
 
 
 def create_continuous_text_captions(direct_text: str, caption: str, page_num: int) -> str:
@@ -405,14 +1414,9 @@ def normalize_text_flow(text: str) -> str:
     Returns:
         str: Texto normalizado
     """
-    import re
-    
-    # Reemplazar múltiples saltos de línea y tabulaciones con un espacio
-    text = re.sub(r'[\n\t]+', ' ', text)
-    # Reemplazar múltiples espacios con uno solo
-    text = re.sub(r'\s+', ' ', text).strip()
-    
-    return text
+    # Reemplazar saltos de línea, tabulaciones y espacios múltiples con uno solo
+    # (\s ya incluye \n y \t, así que basta una pasada)
+    return _WS_MULTI.sub(' ', text).strip()
 
 
 def get_pdf_info(pdf_path: str) -> dict:
@@ -431,7 +1435,7 @@ def get_pdf_info(pdf_path: str) -> dict:
     pdf_document = fitz.open(pdf_path)
     
     info = {
-        'num_pages': len(pdf_document),
+        'num_pages': pdf_document.page_count,
         'metadata': pdf_document.metadata,
         'file_size': os.path.getsize(pdf_path)
     }
@@ -442,10 +1446,16 @@ def get_pdf_info(pdf_path: str) -> dict:
 
 def extract_text_with_blip_and_ocr(pdf_path: str, 
                                    output_path: Optional[str] = None,
-                                   blip_model: str = "Salesforce/blip-image-captioning-base",
+                                   blip_model: str = DEFAULT_BLIP_MODEL,
                                    ocr_languages: str = 'spa+eng',
                                    dpi: int = 300,
-                                   device: str = "auto") -> str:
+                                   device: str = "auto",
+                                   batch_size: int = 8,
+                                   return_text: bool = True,
+                                   skip_text_only_pages: bool = True,
+                                   dtype: Optional[str] = None,
+                                   use_tensorrt: bool = False,
+                                   quantize: Optional[bool] = None) -> str:
     """
     Extrae texto de un PDF combinando BLIP (descripción de imágenes) y OCR (transcripción de texto).
     Formato de salida: [Descripción de la imagen: ... | Transcripción de la imagen: ...]
@@ -455,8 +1465,20 @@ def extract_text_with_blip_and_ocr(pdf_path: str,
         output_path (str, optional): Ruta donde guardar el texto extraído
         blip_model (str): Modelo BLIP para image captioning
         ocr_languages (str): Idiomas para OCR (formato tesseract: 'spa+eng')
-        dpi (int): DPI para renderizar las páginas del PDF
+        dpi (int): DPI para renderizar las páginas del PDF (para el OCR; BLIP
+            recibe una copia reducida a BLIP_MAX_SIDE píxeles de lado)
         device (str): Dispositivo a usar ("auto", "cpu", "cuda")
+        batch_size (int): Páginas por lote de captioning/traducción
+        return_text (bool): Si es False no se acumula el texto en memoria
+            (solo se escribe en output_path) y se devuelve ""
+        skip_text_only_pages (bool): No renderizar ni describir las páginas con
+            texto abundante y sin imágenes (se usa solo su texto directo)
+        dtype (str, optional): Precisión de los modelos ("fp16", "bf16", "fp32");
+            por defecto FP16 en CUDA y FP32 en CPU
+        use_tensorrt (bool): Correr el encoder de visión de BLIP con TensorRT
+            (solo CUDA; el engine se construye la primera vez y se cachea)
+        quantize (bool, optional): Cuantizar BLIP a INT8 dinámico (solo en CPU
+            y en FP32); por defecto solo con BLIP_QUANTIZE definida
     
     Returns:
         str: Texto extraído del PDF con descripciones y transcripciones
@@ -465,92 +1487,19 @@ def extract_text_with_blip_and_ocr(pdf_path: str,
     if not os.path.exists(pdf_path):
         raise FileNotFoundError(f"El archivo PDF no existe: {pdf_path}")
     
-    print(f"Procesando PDF con BLIP + OCR: {pdf_path}")
-    print(f"Modelo BLIP: {blip_model}")
-    print(f"Idiomas OCR: {ocr_languages}")
-    print(f"DPI: {dpi}")
-    print(f"Dispositivo: {device}")
-    
-    # Configurar dispositivo
-    if device == "auto":
-        device = "cuda" if torch.cuda.is_available() else "cpu"
+    # Fallar rápido si la salida no se puede escribir (antes de cargar BLIP)
+    _check_output_path(output_path)
     
-    print(f"Usando dispositivo: {device}")
+    logger.info("Procesando PDF con BLIP + OCR: %s (modelo BLIP: %s, idiomas OCR: %s, DPI: %s, dispositivo: %s)",
+                pdf_path, blip_model, ocr_languages, dpi, device)
     
-    # Cargar modelos BLIP y Traductor
-    print("Cargando modelo BLIP...")
-    translator = None
     try:
-        # Cargar BLIP
-        processor = BlipProcessor.from_pretrained(blip_model, use_fast=True)
-        model = BlipForConditionalGeneration.from_pretrained(blip_model)
-        model.to(device)
-        print("✅ Modelo BLIP cargado exitosamente")
-
-        # Cargar modelo de traducción
-        print("Cargando modelo de traducción (en-es)...")
-        translator = pipeline("translation_en_to_es", 
-                              model="Helsinki-NLP/opus-mt-en-es",
-                              device=device)
-        print("✅ Modelo de traducción cargado.")
-        
+        extractor = get_extractor(blip_model, device, batch_size, dtype, use_tensorrt, quantize)
     except Exception as e:
         print(f"❌ Error cargando modelos: {e}")
         return ""
     
-    # Abrir el PDF
-    pdf_document = fitz.open(pdf_path)
-    all_text = []
-    
-    for page_num in range(len(pdf_document)):
-        print(f"Procesando página {page_num + 1}/{len(pdf_document)}")
-        
-        page = pdf_document[page_num]
-        
-        # 1. Extraer texto directo del PDF (si existe)
-        page_text = page.get_text()
-        
-        # 2. Renderizar página como imagen
-        mat = fitz.Matrix(dpi/72, dpi/72)
-        pix = page.get_pixmap(matrix=mat)
-        img_data = pix.tobytes("png")
-        pil_image = Image.open(io.BytesIO(img_data))
-        
-        # 3. Generar descripción con BLIP
-        try:
-            description = generate_unconditional_caption(pil_image, processor, model, device, translator)
-        except Exception as e:
-            print(f"  > Error generando descripción página {page_num + 1}: {e}")
-            description = ""
-        
-        # 4. Extraer texto con OCR
-        try:
-            import pytesseract
-            ocr_text = pytesseract.image_to_string(pil_image, lang=ocr_languages)
-        except Exception as e:
-            print(f"  > Error en OCR página {page_num + 1}: {e}")
-            ocr_text = ""
-        
-        # 5. Combinar resultados en el formato solicitado
-        page_content = combine_description_and_ocr(page_text, description, ocr_text, page_num + 1)
-        
-        if page_content.strip():
-            all_text.append(page_content)
-            all_text.append("\n\n")  # Separador entre páginas
-    
-    pdf_document.close()
-    
-    # Combinar todo el texto
-    full_text = "".join(all_text)
-    
-    # Guardar si se especifica output_path
-    if output_path:
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(full_text)
-        print(f"Texto guardado en: {output_path}")
-    
-    return full_text
+    return extractor.extract_with_ocr(pdf_path, output_path, ocr_languages, dpi, return_text, skip_text_only_pages)
 
 
 def combine_description_and_ocr(direct_text: str, description: str, ocr_text: str, page_num: int) -> str:
@@ -594,17 +1543,19 @@ def combine_description_and_ocr(direct_text: str, description: str, ocr_text: st
     
     # Si hay texto directo, combinarlo con descripción y OCR
     result = direct_text
+    # Tokenizar el texto directo una sola vez para ambas comparaciones
+    words_direct = _word_set(direct_text)
     
     # Agregar descripción si es relevante
-    if description and not is_similar_content(direct_text, description):
+    if description and not is_similar_content(words_direct, description):
         result += f"\n\n[Descripción de la imagen: {description}"
         
         # Agregar transcripción si existe
-        if ocr_text and not is_similar_content(direct_text, ocr_text):
+        if ocr_text and not is_similar_content(words_direct, ocr_text):
             result += f" | Transcripción de la imagen: {ocr_text}"
         
         result += "]"
-    elif ocr_text and not is_similar_content(direct_text, ocr_text):
+    elif ocr_text and not is_similar_content(words_direct, ocr_text):
         # Solo transcripción si no hay descripción
         result += f"\n\n[Transcripción de la imagen: {ocr_text}]"
     
@@ -620,14 +1571,27 @@ def main():
     parser = argparse.ArgumentParser(description='Extraer texto de PDFs usando BLIP + OCR')
     parser.add_argument('pdf_path', help='Ruta al archivo PDF')
     parser.add_argument('-o', '--output', help='Archivo de salida para el texto')
-    parser.add_argument('-m', '--model', default='Salesforce/blip-image-captioning-base',
+    parser.add_argument('-m', '--model', default=DEFAULT_BLIP_MODEL,
                         help='Modelo BLIP para image captioning')
     parser.add_argument('-l', '--languages', default='spa+eng',
                         help='Idiomas para OCR (default: spa+eng)')
     parser.add_argument('-d', '--dpi', type=int, default=300,
                         help='DPI para renderizar páginas (default: 300)')
+    parser.add_argument('--blip-dpi', type=lambda value: value if value == 'auto' else int(value),
+                        default=BLIP_DPI,
+                        help=f'DPI de render para BLIP sin OCR, o "auto" según el tamaño de página (default: {BLIP_DPI})')
     parser.add_argument('--device', default='auto', choices=['auto', 'cpu', 'cuda'],
                         help='Dispositivo a usar (default: auto)')
+    parser.add_argument('-b', '--batch-size', type=int, default=8,
+                        help='Páginas por lote de captioning/traducción (default: 8)')
+    parser.add_argument('--dtype', default='auto', choices=['auto', *_DTYPES],
+                        help='Precisión de los modelos (default: fp16 en CUDA, fp32 en CPU)')
+    parser.add_argument('--tensorrt', action='store_true',
+                        help='Encoder de visión de BLIP con TensorRT (solo CUDA)')
+    parser.add_argument('--quantize', action='store_true', default=None,
+                        help='Cuantizar BLIP a INT8 en CPU (más rápido, puede cambiar los captions)')
+    parser.add_argument('--caption-all-pages', action='store_true',
+                        help='Describir también las páginas de solo texto (más lento)')
     parser.add_argument('--continuous', action='store_true',
                         help='Extraer texto en flujo continuo (recomendado)')
     parser.add_argument('--unified', action='store_true',
@@ -637,6 +1601,8 @@ def main():
     
     args = parser.parse_args()
     
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    
     start_time = time.time()
     
     try:
@@ -655,7 +1621,12 @@ def main():
                 args.model,
                 args.languages,
                 args.dpi,
-                args.device
+                args.device,
+                args.batch_size,
+                skip_text_only_pages=not args.caption_all_pages,
+                dtype=args.dtype,
+                use_tensorrt=args.tensorrt,
+                quantize=args.quantize
             )
             print(f"\nTexto extraído con BLIP + OCR: {len(text)} caracteres")
         elif args.continuous:
@@ -664,7 +1635,13 @@ def main():
                 args.output, 
                 args.model,
                 args.dpi,
-                args.device
+                args.device,
+                args.batch_size,
+                skip_text_only_pages=not args.caption_all_pages,
+                blip_dpi=args.blip_dpi,
+                dtype=args.dtype,
+                use_tensorrt=args.tensorrt,
+                quantize=args.quantize
             )
             print(f"\nTexto extraído en flujo continuo: {len(text)} caracteres")
         else:
@@ -673,7 +1650,13 @@ def main():
                 args.output, 
                 args.model,
                 args.dpi,
-                args.device
+                args.device,
+                args.batch_size,
+                skip_text_only_pages=not args.caption_all_pages,
+                blip_dpi=args.blip_dpi,
+                dtype=args.dtype,
+                use_tensorrt=args.tensorrt,
+                quantize=args.quantize
             )
             print(f"\nTexto extraído: {len(text)} caracteres")
             
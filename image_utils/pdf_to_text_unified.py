@@ -5,12 +5,39 @@ Incluye todas las dependencias necesarias y manejo automático de instalaciones.
 Formato de salida: [Descripción de la imagen: ... | Transcripción de la imagen: ...]
 """
 
+import hmac
+import importlib.util
+import json
 import os
+import secrets
+import socket
 import sys
 import subprocess
 import time
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional
+
+# Modo servidor (--server): puerto por defecto (0 = lo asigna el sistema) y
+# archivo privado (0600) donde el servidor deja su puerto y el token de esta
+# ejecución para los clientes
+DEFAULT_SERVER_PORT = int(os.getenv('PDF_TO_TEXT_SERVER_PORT', '0'))
+SERVER_INFO_FILE = os.getenv(
+    'PDF_TO_TEXT_SERVER_FILE',
+    os.path.join(os.path.expanduser('~'), '.cache', 'pdf_to_text_unified', 'server.json')
+)
+# Límites por conexión: segundos para leer el pedido (y enviar la respuesta) y
+# tamaño máximo del pedido
+SERVER_REQUEST_TIMEOUT = 10
+SERVER_MAX_REQUEST_SIZE = 1 << 16
+
+# Hash de palabras para comparar textos (word_hashes): xxh3 (SIMD) si xxhash
+# está instalado; si no, el hash() de Python
+try:
+    from xxhash import xxh3_64_intdigest as _word_hash
+    _WORD_HASH_DTYPE = 'uint64'
+except ImportError:
+    _word_hash = hash
+    _WORD_HASH_DTYPE = 'int64'
 
 def install_dependencies():
     """
@@ -25,18 +52,17 @@ def install_dependencies():
         'sacremoses'
     ]
     
+    # Nombre del módulo importable cuando difiere del paquete de pip
+    module_map = {'PyMuPDF': 'fitz', 'Pillow': 'PIL'}
+    
     missing_packages = []
     
     for package in required_packages:
-        try:
-            if package == 'PyMuPDF':
-                import fitz
-            elif package == 'Pillow':
-                import PIL
-            else:
-                __import__(package)
+        # find_spec solo busca el paquete, sin ejecutar su código (importar
+        # torch/transformers para verificarlos tarda varios segundos)
+        if importlib.util.find_spec(module_map.get(package, package)) is not None:
             print(f"✅ {package} encontrado")
-        except ImportError:
+        else:
             missing_packages.append(package)
             print(f"❌ {package} no encontrado")
     
@@ -72,159 +98,606 @@ def check_tesseract():
         print("   macOS: brew install tesseract")
         return False
 
+def get_inference_dtype(device: str):
+    """
+    Precisión para inferencia: BF16 en GPUs que lo soportan (Ampere+, sin los
+    overflows de FP16), FP16 en el resto de GPUs y FP32 en CPU.
+    """
+    import torch
+    
+    if device != "cuda":
+        return torch.float32
+    return torch.bfloat16 if torch.cuda.is_bf16_supported() else torch.float16
+
+
+def compile_models(processor, model, translator, device: str, batch_size: int) -> bool:
+    """
+    Compila el encoder de visión de BLIP con torch.compile(mode="reduce-overhead")
+    (CUDA graphs) y hace un warm-up con un lote de ceros, para que la primera
+    página real no pague la compilación. generate() no pasa por el forward
+    compilado del modelo completo, por eso se compila el encoder de visión, que
+    es el que recibe formas fijas (B, 3, 384, 384). El traductor recibe un largo
+    distinto en cada paso de generate(): se compila sin CUDA graphs y con formas
+    dinámicas.
+    
+    Returns:
+        bool: True si se compiló (solo en CUDA)
+    """
+    import torch
+    
+    if device != "cuda" or not hasattr(torch, "compile"):
+        return False
+    
+    # Módulos sin compilar, para volver a ellos si la compilación falla: los
+    # errores de torch.compile aparecen recién en la primera llamada
+    vision_model = model.vision_model
+    translator_forward = translator.model.forward
+    
+    try:
+        model.to(memory_format=torch.channels_last)
+        model.vision_model = torch.compile(vision_model, mode="reduce-overhead", fullgraph=False)
+        translator.model.forward = torch.compile(translator_forward, mode="default", dynamic=True)
+        
+        size = processor.image_processor.size
+        dummy = torch.zeros(batch_size, 3, size["height"], size["width"], device=device, dtype=model.dtype)
+        with torch.inference_mode():
+            model.vision_model(pixel_values=dummy)
+            translator(["warm up"], max_length=8)
+        print("✅ Modelos compilados con torch.compile")
+        return True
+    except Exception as e:
+        model.vision_model = vision_model
+        translator.model.forward = translator_forward
+        print(f"⚠️  torch.compile no disponible, se usan los modelos sin compilar: {e}")
+        return False
+
+
+class Extractor:
+    """
+    Extractor BLIP + OCR con los modelos cargados una sola vez.
+    
+    Cargar BLIP y el traductor tarda varios segundos; al reutilizar la misma
+    instancia para muchos PDFs (modo --server o DocsProcessor) ese costo se
+    paga una vez en lugar de una vez por archivo.
+    """
+    
+    def __init__(self,
+                 blip_model: str = "Salesforce/blip-image-captioning-base",
+                 ocr_languages: str = 'spa+eng',
+                 dpi: int = 300,
+                 device: str = "auto",
+                 batch_size: int = 8,
+                 blip_dpi: int = 96):
+        """
+        Carga BLIP y el modelo de traducción.
+        
+        Args:
+            blip_model (str): Modelo BLIP para image captioning
+            ocr_languages (str): Idiomas para OCR (formato tesseract: 'spa+eng')
+            dpi (int): DPI para renderizar las páginas del PDF para OCR
+            device (str): Dispositivo a usar ("auto", "cpu", "cuda")
+            batch_size (int): Páginas por lote de BLIP + traducción
+            blip_dpi (int): DPI de la imagen para BLIP (que la redimensiona a 384x384
+                de todas formas, así que más resolución solo agrega costo)
+        """
+        import torch
+        from transformers import BlipProcessor, BlipForConditionalGeneration, pipeline
+        from concurrent.futures import ThreadPoolExecutor
+        
+        self.blip_model = blip_model
+        self.ocr_languages = ocr_languages
+        self.dpi = dpi
+        self.batch_size = batch_size
+        self.blip_dpi = blip_dpi
+        
+        print(f"Modelo BLIP: {blip_model}")
+        print(f"Idiomas OCR: {ocr_languages}")
+        print(f"DPI: {dpi} (OCR) / {blip_dpi} (BLIP)")
+        print(f"Dispositivo: {device}")
+        print(f"Tamaño de lote: {batch_size}")
+        
+        # Configurar dispositivo
+        if device == "auto":
+            device = "cuda" if torch.cuda.is_available() else "cpu"
+        self.device = device
+        
+        dtype = get_inference_dtype(device)
+        print(f"Usando dispositivo: {device} ({dtype})")
+        
+        # Cargar BLIP
+        print("Cargando modelo BLIP...")
+        self.processor = BlipProcessor.from_pretrained(blip_model, use_fast=True)
+        self.model = BlipForConditionalGeneration.from_pretrained(blip_model, torch_dtype=dtype)
+        self.model.to(device)
+        self.model.eval()
+        self.model.config.use_cache = True
+        print("✅ Modelo BLIP cargado exitosamente")
+        
+        # Cargar modelo de traducción
+        print("Cargando modelo de traducción (en-es)...")
+        self.translator = pipeline("translation_en_to_es", 
+                                   model="Helsinki-NLP/opus-mt-en-es",
+                                   device=device,
+                                   torch_dtype=dtype)
+        self.translator.model.eval()
+        print("✅ Modelo de traducción cargado.")
+        
+        # En GPU: CUDA graphs para formas fijas; el último lote se rellena hasta batch_size
+        self.compiled = compile_models(self.processor, self.model, self.translator, device, batch_size)
+        
+        # Pool de OCR: pytesseract lanza el binario de tesseract como subproceso (que
+        # a su vez usa varios hilos), así que unos pocos hilos de Python alcanzan para
+        # paralelizar el OCR entre páginas sin serializar imágenes entre procesos
+        self.ocr_pool = ThreadPoolExecutor(max_workers=max(1, (os.cpu_count() or 4) // 4))
+    
+    def close(self):
+        """
+        Libera el pool de OCR.
+        """
+        self.ocr_pool.shutdown()
+    
+    def extract(self, pdf_path: str, output_path: Optional[str] = None,
+                return_text: bool = True) -> str:
+        """
+        Extrae texto de un PDF combinando BLIP (descripción de imágenes) y OCR (transcripción de texto).
+        Con output_path cada página se escribe en el archivo apenas se procesa.
+        
+        Args:
+            pdf_path (str): Ruta al archivo PDF
+            output_path (str, optional): Ruta donde guardar el texto extraído
+            return_text (bool): Si False no se acumula el texto en memoria y se
+                devuelve "" (útil con output_path en PDFs muy grandes)
+        
+        Returns:
+            str: Texto extraído del PDF con descripciones y transcripciones
+        """
+        import fitz  # PyMuPDF
+        from PIL import Image
+        import pytesseract
+        import queue
+        import threading
+        
+        if not os.path.exists(pdf_path):
+            raise FileNotFoundError(f"El archivo PDF no existe: {pdf_path}")
+        
+        print(f"Procesando PDF con BLIP + OCR: {pdf_path}")
+        
+        batch_size = self.batch_size
+        
+        # Abrir el PDF
+        pdf_document = fitz.open(pdf_path)
+        all_text = [] if return_text else None
+        
+        # Archivo de salida abierto una sola vez: las páginas se escriben a medida
+        # que se procesan, sin juntar todo el texto antes de guardarlo
+        output_file = None
+        if output_path:
+            Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+            output_file = open(output_path, 'w', encoding='utf-8', buffering=1 << 20)
+        
+        def process_batch(batch):
+            # 4. Lanzar el OCR de todo el lote en paralelo (corre mientras BLIP trabaja)
+            ocr_futures = [self.ocr_pool.submit(pytesseract.image_to_string, ocr_image, lang=self.ocr_languages)
+                           for _, _, _, ocr_image in batch]
+            
+            # 3. Generar descripciones con BLIP para todo el lote (una sola llamada)
+            try:
+                descriptions = generate_captions_batch([blip_image for _, _, blip_image, _ in batch],
+                                                       self.processor, self.model, self.device, self.translator,
+                                                       pad_to=batch_size if self.compiled else None)
+            except Exception as e:
+                print(f"  > Error generando descripciones páginas {batch[0][0] + 1}-{batch[-1][0] + 1}: {e}")
+                descriptions = [""] * len(batch)
+            
+            for (page_num, page_text, _, _), description, ocr_future in zip(batch, descriptions, ocr_futures):
+                # Recoger el texto del OCR
+                try:
+                    ocr_text = ocr_future.result()
+                except Exception as e:
+                    print(f"  > Error en OCR página {page_num + 1}: {e}")
+                    ocr_text = ""
+                
+                # 5. Combinar resultados en el formato solicitado
+                page_content = combine_description_and_ocr(page_text, description, ocr_text, page_num + 1)
+                
+                if page_content.strip():
+                    page_content += "\n\n"  # Separador entre páginas
+                    if output_file:
+                        output_file.write(page_content)
+                    if all_text is not None:
+                        all_text.append(page_content)
+        
+        # Productor: un hilo de fondo extrae el texto y renderiza las páginas mientras
+        # el hilo principal corre BLIP/OCR. PyMuPDF no es thread-safe, así que solo
+        # ese hilo toca el documento. La cola acotada limita las imágenes en memoria.
+        num_pages = len(pdf_document)
+        render_queue = queue.Queue(maxsize=2 * batch_size)
+        
+        # Matrices de escala creadas una sola vez para todo el documento
+        mat_ocr = fitz.Matrix(self.dpi/72, self.dpi/72)
+        blip_dpi = min(self.blip_dpi, self.dpi)
+        mat_blip = fitz.Matrix(blip_dpi/72, blip_dpi/72)
+        
+        def render(page, mat):
+            pix = page.get_pixmap(matrix=mat, alpha=False)
+            # Construir la imagen directo desde las muestras crudas (sin PNG)
+            return Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+        
+        # Si el consumidor termina antes (error en BLIP/OCR o al escribir), el
+        # productor no debe quedar bloqueado para siempre en la cola llena
+        stop_rendering = threading.Event()
+        
+        def put(item) -> bool:
+            while not stop_rendering.is_set():
+                try:
+                    render_queue.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+        
+        def render_worker():
+            try:
+                for page_num, page in enumerate(pdf_document):
+                    if stop_rendering.is_set():
+                        return
+                    
+                    # 1. Extraer texto directo del PDF (si existe). Una página sin
+                    #    fuentes (p. ej. un escaneo) no puede tener texto: se evita
+                    #    el análisis de layout de MuPDF consultando solo sus recursos
+                    page_text = page.get_text() if page.get_fonts() else ""
+                    
+                    # 2. Renderizar la página dos veces: a DPI completo para OCR y a
+                    #    blip_dpi para BLIP (unas 10x menos píxeles que mover y normalizar)
+                    ocr_image = render(page, mat_ocr)
+                    blip_image = render(page, mat_blip)
+                    
+                    if not put((page_num, page_text, blip_image, ocr_image)):
+                        return
+                    
+                    # Vaciar el store interno de MuPDF (fuentes, imágenes decodificadas)
+                    # cada lote para que no crezca en PDFs de cientos de páginas
+                    if (page_num + 1) % batch_size == 0:
+                        fitz.TOOLS.store_shrink(100)
+            except Exception as e:
+                put(e)
+            finally:
+                put(None)  # Fin del documento
+        
+        render_thread = threading.Thread(target=render_worker, daemon=True)
+        render_thread.start()
+        
+        # Consumidor: arma los lotes a medida que llegan las páginas renderizadas
+        try:
+            batch = []
+            while True:
+                item = render_queue.get()
+                if item is None:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                
+                print(f"Procesando página {item[0] + 1}/{num_pages}")
+                batch.append(item)
+                if len(batch) >= batch_size:
+                    process_batch(batch)
+                    batch = []  # Soltar las imágenes del lote ya procesado
+            
+            if batch:
+                process_batch(batch)
+            del batch
+        finally:
+            # Detener el productor, soltar las páginas que quedaron en la cola y
+            # cerrar el documento recién cuando el hilo ya no lo usa
+            stop_rendering.set()
+            while True:
+                try:
+                    render_queue.get_nowait()
+                except queue.Empty:
+                    break
+            render_thread.join()
+            pdf_document.close()
+            if output_file:
+                output_file.close()
+        
+        # Devolver al driver la memoria cacheada del documento: en modo servidor
+        # el proceso sigue vivo y el siguiente PDF puede usar otro tamaño de lote
+        # final. No se hace por lote porque forzaría a reservar memoria de nuevo
+        # en cada generate (y rompería la reutilización de los CUDA graphs)
+        if self.device == "cuda":
+            import torch
+            torch.cuda.empty_cache()
+        
+        if output_path:
+            print(f"Texto guardado en: {output_path}")
+        
+        return "".join(all_text) if all_text is not None else ""
+
+
 def extract_text_with_blip_and_ocr(pdf_path: str, 
                                    output_path: Optional[str] = None,
                                    blip_model: str = "Salesforce/blip-image-captioning-base",
                                    ocr_languages: str = 'spa+eng',
                                    dpi: int = 300,
-                                   device: str = "auto") -> str:
+                                   device: str = "auto",
+                                   batch_size: int = 8,
+                                   blip_dpi: int = 96) -> str:
     """
     Extrae texto de un PDF combinando BLIP (descripción de imágenes) y OCR (transcripción de texto).
     Formato de salida: [Descripción de la imagen: ... | Transcripción de la imagen: ...]
+    Carga los modelos en cada llamada; para procesar muchos PDFs conviene
+    reutilizar un Extractor.
     
     Args:
         pdf_path (str): Ruta al archivo PDF
         output_path (str, optional): Ruta donde guardar el texto extraído
         blip_model (str): Modelo BLIP para image captioning
         ocr_languages (str): Idiomas para OCR (formato tesseract: 'spa+eng')
-        dpi (int): DPI para renderizar las páginas del PDF
+        dpi (int): DPI para renderizar las páginas del PDF para OCR
         device (str): Dispositivo a usar ("auto", "cpu", "cuda")
+        batch_size (int): Páginas por lote de BLIP + traducción
+        blip_dpi (int): DPI de la imagen para BLIP
     
     Returns:
         str: Texto extraído del PDF con descripciones y transcripciones
     """
-    
-    # Importar dependencias
-    import fitz  # PyMuPDF
-    import torch
-    from transformers import BlipProcessor, BlipForConditionalGeneration, pipeline
-    from PIL import Image
-    import io
-    import pytesseract
-    
     if not os.path.exists(pdf_path):
         raise FileNotFoundError(f"El archivo PDF no existe: {pdf_path}")
     
-    print(f"Procesando PDF con BLIP + OCR: {pdf_path}")
-    print(f"Modelo BLIP: {blip_model}")
-    print(f"Idiomas OCR: {ocr_languages}")
-    print(f"DPI: {dpi}")
-    print(f"Dispositivo: {device}")
+    # Fallar rápido si la salida no se puede escribir (antes de cargar los modelos)
+    if output_path:
+        Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+        open(output_path, 'w', encoding='utf-8').close()
+    
+    try:
+        extractor = Extractor(blip_model, ocr_languages, dpi, device, batch_size, blip_dpi)
+    except Exception as e:
+        print(f"❌ Error cargando modelos: {e}")
+        return ""
+    
+    try:
+        return extractor.extract(pdf_path, output_path)
+    finally:
+        extractor.close()
+
+
+def _write_server_info(port: int, token: str, info_file: str = SERVER_INFO_FILE):
+    """
+    Guarda el puerto y el token del servidor en un archivo legible solo por
+    el usuario actual (0600), de donde los lee request_extraction.
     
-    # Configurar dispositivo
-    if device == "auto":
-        device = "cuda" if torch.cuda.is_available() else "cpu"
+    Args:
+        port (int): Puerto TCP en localhost
+        token (str): Token aleatorio de esta ejecución
+        info_file (str): Ruta del archivo
+    """
+    os.makedirs(os.path.dirname(info_file), mode=0o700, exist_ok=True)
+    if os.path.exists(info_file):
+        os.remove(info_file)
+    fd = os.open(info_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump({"port": port, "token": token}, f)
+
+
+def _read_server_info(info_file: str = SERVER_INFO_FILE) -> dict:
+    """
+    Lee el puerto y el token que dejó el servidor en ejecución.
     
-    print(f"Usando dispositivo: {device}")
+    Args:
+        info_file (str): Ruta del archivo
     
-    # Cargar modelos BLIP y Traductor
-    print("Cargando modelo BLIP...")
-    translator = None
+    Returns:
+        dict: {"port": int, "token": str}
+    """
     try:
-        # Cargar BLIP
-        processor = BlipProcessor.from_pretrained(blip_model, use_fast=True)
-        model = BlipForConditionalGeneration.from_pretrained(blip_model)
-        model.to(device)
-        print("✅ Modelo BLIP cargado exitosamente")
+        with open(info_file, encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        raise RuntimeError(f"No hay un servidor iniciado con --server ({info_file} no existe)")
 
-        # Cargar modelo de traducción
-        print("Cargando modelo de traducción (en-es)...")
-        translator = pipeline("translation_en_to_es", 
-                              model="Helsinki-NLP/opus-mt-en-es",
-                              device=device)
-        print("✅ Modelo de traducción cargado.")
-        
+
+def _send_json(conn: socket.socket, message: dict):
+    """Envía un mensaje JSON terminado en salto de línea."""
+    conn.sendall(json.dumps(message).encode('utf-8') + b"\n")
+
+
+def _recv_json(conn: socket.socket, max_size: int = -1) -> dict:
+    """Recibe un mensaje JSON terminado en salto de línea (de hasta max_size bytes)."""
+    with conn.makefile('rb') as f:
+        line = f.readline(max_size)
+    if not line:
+        raise ConnectionError("La conexión se cerró sin respuesta")
+    if max_size > 0 and not line.endswith(b"\n"):
+        raise ValueError(f"Mensaje de más de {max_size} bytes")
+    return json.loads(line)
+
+
+def _handle_connection(conn: socket.socket, extractor: Extractor, token: str) -> bool:
+    """
+    Atiende un pedido del modo servidor (ver serve_forever).
+    
+    Returns:
+        bool: True si el pedido fue detener el servidor
+    """
+    # Un cliente que se conecta y no envía nada no bloquea al servidor
+    conn.settimeout(SERVER_REQUEST_TIMEOUT)
+    request = _recv_json(conn, SERVER_MAX_REQUEST_SIZE)
+    
+    # Comparar bytes: compare_digest rechaza str con caracteres no ASCII
+    client_token = request.get("token") if isinstance(request, dict) else None
+    if not isinstance(client_token, str) or not hmac.compare_digest(
+            client_token.encode('utf-8'), token.encode('utf-8')):
+        _send_json(conn, {"status": "error", "message": "token inválido"})
+        return False
+    
+    if request.get("command") == "stop":
+        _send_json(conn, {"status": "ok", "text": ""})
+        return True
+    
+    pdf_path = request.get("pdf_path")
+    try:
+        text = extractor.extract(pdf_path, request.get("output_path"))
     except Exception as e:
-        print(f"❌ Error cargando modelos: {e}")
-        return ""
+        print(f"❌ Error procesando {pdf_path}: {e}")
+        _send_json(conn, {"status": "error", "message": str(e)})
+        return False
+    _send_json(conn, {"status": "ok", "text": text})
+    return False
+
+
+def serve_forever(extractor: Extractor, port: int = DEFAULT_SERVER_PORT,
+                  info_file: str = SERVER_INFO_FILE):
+    """
+    Modo servidor: mantiene los modelos en memoria y atiende pedidos de
+    extracción en localhost. Los mensajes son JSON (nunca pickle): un pedido
+    es {"token", "pdf_path", "output_path"} y la respuesta {"status", "text"}
+    o {"status": "error", "message"}; {"token", "command": "stop"} detiene el
+    servidor. El token es aleatorio por ejecución y solo se publica en
+    info_file (0600), así que solo el mismo usuario puede hacer pedidos.
     
-    # Abrir el PDF
-    pdf_document = fitz.open(pdf_path)
-    all_text = []
+    Args:
+        extractor (Extractor): Extractor con los modelos ya cargados
+        port (int): Puerto TCP en localhost (0 = lo asigna el sistema)
+        info_file (str): Archivo privado con el puerto y el token
+    """
+    token = secrets.token_hex(32)
     
-    for page_num in range(len(pdf_document)):
-        print(f"Procesando página {page_num + 1}/{len(pdf_document)}")
-        
-        page = pdf_document[page_num]
-        
-        # 1. Extraer texto directo del PDF (si existe)
-        page_text = page.get_text()
-        
-        # 2. Renderizar página como imagen
-        mat = fitz.Matrix(dpi/72, dpi/72)
-        pix = page.get_pixmap(matrix=mat)
-        img_data = pix.tobytes("png")
-        pil_image = Image.open(io.BytesIO(img_data))
-        
-        # 3. Generar descripción con BLIP
-        try:
-            description = generate_unconditional_caption(pil_image, processor, model, device, translator)
-        except Exception as e:
-            print(f"  > Error generando descripción página {page_num + 1}: {e}")
-            description = ""
-        
-        # 4. Extraer texto con OCR
+    with socket.create_server(('localhost', port)) as server:
+        port = server.getsockname()[1]
+        _write_server_info(port, token, info_file)
+        print(f"🟢 Servidor escuchando en localhost:{port} (Ctrl+C para detener)")
         try:
-            ocr_text = pytesseract.image_to_string(pil_image, lang=ocr_languages)
-        except Exception as e:
-            print(f"  > Error en OCR página {page_num + 1}: {e}")
-            ocr_text = ""
-        
-        # 5. Combinar resultados en el formato solicitado
-        page_content = combine_description_and_ocr(page_text, description, ocr_text, page_num + 1)
-        
-        if page_content.strip():
-            all_text.append(page_content)
-            all_text.append("\n\n")  # Separador entre páginas
+            while True:
+                conn, _ = server.accept()
+                with conn:
+                    # Un cliente que envía basura, no responde o se desconecta
+                    # solo pierde su propia conexión
+                    try:
+                        stop = _handle_connection(conn, extractor, token)
+                    except (OSError, ValueError, TypeError, RecursionError) as e:
+                        print(f"⚠️  Pedido inválido: {e!r}")
+                        continue
+                if stop:
+                    print("🔴 Servidor detenido")
+                    return
+        finally:
+            if os.path.exists(info_file):
+                os.remove(info_file)
+
+
+def request_extraction(pdf_path: str, output_path: Optional[str] = None,
+                       port: Optional[int] = None, info_file: str = SERVER_INFO_FILE) -> str:
+    """
+    Cliente del modo servidor: envía un PDF a un servidor ya iniciado con
+    --server y espera el texto extraído.
     
-    pdf_document.close()
+    Args:
+        pdf_path (str): Ruta al archivo PDF (el servidor debe poder leerla)
+        output_path (str, optional): Ruta donde el servidor guarda el texto
+        port (int, optional): Puerto del servidor (por defecto el de info_file)
+        info_file (str): Archivo privado con el puerto y el token del servidor
     
-    # Combinar todo el texto
-    full_text = "".join(all_text)
+    Returns:
+        str: Texto extraído del PDF
+    """
+    info = _read_server_info(info_file)
     
-    # Guardar si se especifica output_path
+    # Rutas absolutas: el servidor puede tener otro directorio de trabajo
+    pdf_path = os.path.abspath(pdf_path)
     if output_path:
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(full_text)
-        print(f"Texto guardado en: {output_path}")
+        output_path = os.path.abspath(output_path)
+    
+    with socket.create_connection(('localhost', port or info["port"])) as conn:
+        _send_json(conn, {"token": info["token"], "pdf_path": pdf_path, "output_path": output_path})
+        response = _recv_json(conn)
     
-    return full_text
+    if response.get("status") != "ok":
+        raise RuntimeError(f"El servidor no pudo procesar {pdf_path}: {response.get('message')}")
+    return response["text"]
 
 
-def generate_unconditional_caption(image, processor, model, device: str, translator_pipeline) -> str:
+def images_to_pixel_values(images: List, processor, device: str, dtype):
     """
-    Genera un caption incondicional para una imagen usando BLIP y lo traduce al español.
+    Prepara los pixel_values de BLIP sin pasar por el image processor en CPU:
+    redimensiona con PIL (BICUBIC, igual que el procesador), sube el lote como
+    uint8 desde memoria pinned (4x menos bytes que float32) y hace el reescalado
+    y la normalización en el dispositivo, en la precisión del modelo.
+    
+    Returns:
+        torch.Tensor: pixel_values de forma (B, 3, alto, ancho)
+    """
+    import numpy as np
+    import torch
+    from PIL import Image
+    
+    image_processor = processor.image_processor
+    height, width = image_processor.size["height"], image_processor.size["width"]
+    
+    batch = np.stack([np.asarray(image.resize((width, height), Image.BICUBIC)) for image in images])
+    tensor = torch.from_numpy(batch)
+    if device == "cuda":
+        tensor = tensor.pin_memory()
+    
+    # NHWC -> NCHW como vista: la memoria queda en formato channels_last
+    pixel_values = tensor.to(device, non_blocking=True).permute(0, 3, 1, 2).to(dtype).div_(255)
+    mean = torch.tensor(image_processor.image_mean, device=device, dtype=dtype).view(1, 3, 1, 1)
+    std = torch.tensor(image_processor.image_std, device=device, dtype=dtype).view(1, 3, 1, 1)
+    return (pixel_values - mean) / std
+
+
+def generate_captions_batch(images: List, processor, model, device: str, translator_pipeline,
+                            pad_to: Optional[int] = None) -> List[str]:
+    """
+    Genera captions incondicionales para un lote de imágenes con una sola llamada
+    a BLIP y los traduce al español con una sola llamada al traductor.
+    Con pad_to, un lote más corto se rellena repitiendo la última imagen para
+    mantener la forma fija que esperan los CUDA graphs (el relleno se descarta).
     """
     import torch
+    from contextlib import nullcontext
+    
+    # Asegurar que las imágenes estén en RGB
+    images = [image if image.mode == 'RGB' else image.convert('RGB') for image in images]
+    num_images = len(images)
+    if pad_to and num_images < pad_to:
+        images = images + [images[-1]] * (pad_to - num_images)
+    
+    # Generar captions en INGLÉS (pixel_values ya en la precisión del modelo)
+    pixel_values = images_to_pixel_values(images, processor, device, model.dtype)
+    
+    autocast = torch.autocast(device_type="cuda", dtype=model.dtype) if device == "cuda" else nullcontext()
+    with torch.inference_mode(), autocast:
+        # Greedy con KV cache; 20 tokens alcanzan para un caption incondicional
+        out = model.generate(pixel_values=pixel_values, max_new_tokens=20, num_beams=1, do_sample=False, use_cache=True)
+    
+    # Decodificar los resultados en INGLÉS
+    captions_en = [caption.strip() for caption in processor.batch_decode(out, skip_special_tokens=True)][:num_images]
+    
+    # Soltar los tensores de BLIP antes de traducir para que no coincidan con
+    # el pico de memoria del traductor
+    del pixel_values, out
+    
+    # Traducir a ESPAÑOL (solo los captions no vacíos)
+    pending = [caption for caption in captions_en if caption]
+    if not translator_pipeline or not pending:
+        return [f"[EN] {caption}" if caption else "" for caption in captions_en]
     
     try:
-        # Asegurar que la imagen esté en RGB
-        if image.mode != 'RGB':
-            image = image.convert('RGB')
-        
-        # Generar caption en INGLÉS
-        inputs = processor(image, return_tensors="pt")
-        inputs = {k: v.to(device) for k, v in inputs.items()}
-        
-        with torch.no_grad():
-            out = model.generate(**inputs, max_length=50) 
-        
-        # Decodificar el resultado en INGLÉS
-        caption_en = processor.decode(out[0], skip_special_tokens=True).strip()
-        
-        # Traducir a ESPAÑOL
-        if translator_pipeline and caption_en:
-            try:
-                translation = translator_pipeline(caption_en, max_length=100)
-                caption_es = translation[0]['translation_text']
-                return caption_es.strip()
-            except Exception as e:
-                print(f"  > Error traduciendo '{caption_en}': {e}")
-                return f"[EN] {caption_en}"
-        else:
-            return f"[EN] {caption_en}"
-            
+        translations = iter(translator_pipeline(pending, batch_size=len(pending),
+                                               max_new_tokens=40, num_beams=1))
+    except Exception as e:
+        print(f"  > Error traduciendo lote de {len(pending)} captions: {e}")
+        return [f"[EN] {caption}" if caption else "" for caption in captions_en]
+    
+    return [next(translations)['translation_text'].strip() if caption else "" for caption in captions_en]
+
+
+def generate_unconditional_caption(image, processor, model, device: str, translator_pipeline) -> str:
+    """
+    Genera un caption incondicional para una imagen usando BLIP y lo traduce al español.
+    """
+    try:
+        return generate_captions_batch([image], processor, model, device, translator_pipeline)[0]
     except Exception as e:
         print(f"  > Error generando caption: {e}")
         return ""
@@ -261,42 +734,61 @@ def combine_description_and_ocr(direct_text: str, description: str, ocr_text: st
     
     # Si hay texto directo, combinarlo con descripción y OCR
     result = direct_text
+    # Tokenizar el texto directo una sola vez para ambas comparaciones
+    direct_hashes = word_hashes(direct_text)
     
     # Agregar descripción si es relevante
-    if description and not is_similar_content(direct_text, description):
+    if description and not is_similar_content(direct_hashes, description):
         result += f"\n\n[Descripción de la imagen: {description}"
         
         # Agregar transcripción si existe
-        if ocr_text and not is_similar_content(direct_text, ocr_text):
-            result += f" | Transcripción de la imagen: {ocr_text}]"
+        if ocr_text and not is_similar_content(direct_hashes, ocr_text):
+            result += f" | Transcripción de la imagen: {ocr_text}"
         
         result += "]"
-    elif ocr_text and not is_similar_content(direct_text, ocr_text):
+    elif ocr_text and not is_similar_content(direct_hashes, ocr_text):
         # Solo transcripción si no hay descripción
         result += f"\n\n[Transcripción de la imagen: {ocr_text}]"
     
     return result
 
 
-def is_similar_content(text1: str, text2: str, threshold: float = 0.5) -> bool:
+def word_hashes(text: str):
+    """
+    Hashes únicos y ordenados de las palabras de un texto, para calcular
+    Jaccard con NumPy en vez de con sets de strings de Python (ver _word_hash).
+    """
+    import numpy as np
+    
+    words = text.lower().split()
+    hashes = np.fromiter(map(_word_hash, words), dtype=_WORD_HASH_DTYPE, count=len(words))
+    
+    # np.unique ordena y elimina duplicados en una sola pasada
+    return np.unique(hashes)
+
+
+def is_similar_content(text1, text2, threshold: float = 0.5) -> bool:
     """
     Verifica si dos textos son similares (Jaccard similarity).
+    Acepta textos o sus hashes precalculados con word_hashes.
     """
-    if not text1 or not text2:
+    import numpy as np
+    
+    if text1 is None or text2 is None or len(text1) == 0 or len(text2) == 0:
         return False
     
     # Normalizar textos
-    words1 = set(text1.lower().split())
-    words2 = set(text2.lower().split())
+    words1 = text1 if isinstance(text1, np.ndarray) else word_hashes(text1)
+    words2 = text2 if isinstance(text2, np.ndarray) else word_hashes(text2)
     
-    if not words1 or not words2:
+    if words1.size == 0 or words2.size == 0:
         return False
     
-    # Calcular intersección
-    intersection = words1.intersection(words2)
-    union = words1.union(words2)
+    # Calcular intersección (ambos arrays ya son únicos y ordenados)
+    intersection = np.intersect1d(words1, words2, assume_unique=True).size
+    union = words1.size + words2.size - intersection
     
-    similarity = len(intersection) / len(union) if union else 0.0
+    similarity = intersection / union if union else 0.0
     return similarity >= threshold
 
 
@@ -328,7 +820,7 @@ def main():
     import argparse
     
     parser = argparse.ArgumentParser(description='Extraer texto de PDFs usando BLIP + OCR (con todas las dependencias)')
-    parser.add_argument('pdf_path', help='Ruta al archivo PDF')
+    parser.add_argument('pdf_path', nargs='?', help='Ruta al archivo PDF')
     parser.add_argument('-o', '--output', help='Archivo de salida para el texto')
     parser.add_argument('-m', '--model', default='Salesforce/blip-image-captioning-base',
                         help='Modelo BLIP para image captioning')
@@ -338,13 +830,27 @@ def main():
                         help='DPI para renderizar páginas (default: 300)')
     parser.add_argument('--device', default='auto', choices=['auto', 'cpu', 'cuda'],
                         help='Dispositivo a usar (default: auto)')
+    parser.add_argument('--blip-dpi', type=int, default=96,
+                        help='DPI de la imagen para BLIP (default: 96)')
+    parser.add_argument('-b', '--batch-size', type=int, default=8,
+                        help='Páginas por lote de BLIP + traducción (default: 8)')
     parser.add_argument('--info', action='store_true',
                         help='Mostrar información del PDF')
     parser.add_argument('--install-deps', action='store_true',
                         help='Instalar dependencias automáticamente')
+    parser.add_argument('--server', action='store_true',
+                        help='Cargar los modelos una vez y atender PDFs en localhost')
+    parser.add_argument('--connect', action='store_true',
+                        help='Enviar el PDF a un servidor iniciado con --server')
+    parser.add_argument('--port', type=int, default=None,
+                        help='Puerto del modo servidor (default: PDF_TO_TEXT_SERVER_PORT o uno libre '
+                             'asignado por el sistema; con --connect, el que publicó el servidor)')
     
     args = parser.parse_args()
     
+    if not args.server and not args.pdf_path:
+        parser.error("se requiere pdf_path (salvo con --server)")
+    
     # Verificar e instalar dependencias si es necesario
     if args.install_deps:
         print("🔧 Verificando e instalando dependencias...")
@@ -366,13 +872,36 @@ def main():
             print(f"  Metadatos: {info['metadata']}")
             return
         
+        if args.connect:
+            # El servidor ya tiene los modelos cargados: no importar torch aquí
+            text = request_extraction(args.pdf_path, args.output, args.port)
+            print(f"\nTexto extraído con BLIP + OCR: {len(text)} caracteres")
+            return 0
+        
+        # Solo inferencia: desactivar autograd para todo el proceso
+        import torch
+        torch.set_grad_enabled(False)
+        
+        if args.server:
+            extractor = Extractor(args.model, args.languages, args.dpi,
+                                  args.device, args.batch_size, args.blip_dpi)
+            try:
+                serve_forever(extractor, DEFAULT_SERVER_PORT if args.port is None else args.port)
+            except KeyboardInterrupt:
+                print("\n🔴 Servidor detenido")
+            finally:
+                extractor.close()
+            return 0
+        
         text = extract_text_with_blip_and_ocr(
             args.pdf_path, 
             args.output, 
             args.model,
             args.languages,
             args.dpi,
-            args.device
+            args.device,
+            args.batch_size,
+            args.blip_dpi
         )
         print(f"\nTexto extraído con BLIP + OCR: {len(text)} caracteres")
             
@@ -11,22 +11,36 @@ from pathlib import Path
 # Agregar el directorio src al path
 sys.path.append(str(Path(__file__).parent / "src"))
 
-from src.rag_pipeline import create_rag_pipeline
-
 def main():
     parser = argparse.ArgumentParser(description='Inicializar ChromaDB con documentos académicos')
     parser.add_argument('--force', '-f', 
                        action='store_true',
                        help='Forzar recarga de todos los documentos (elimina datos existentes)')
+    parser.add_argument('--workers', '-w',
+                       type=int,
+                       default=1,
+                       help='Procesos para parsear archivos en paralelo (default: 1, secuencial)')
+    parser.add_argument('--embedding-batch-size',
+                       type=int,
+                       default=256,
+                       help='Tamaño de batch para generar embeddings (default: 256)')
     
     args = parser.parse_args()
     
+    # Import diferido: src carga ChromaDB y el modelo de embeddings, así que
+    # --help y los errores de argumentos no deben pagar ese costo
+    from src.rag_pipeline import create_rag_pipeline
+    
     print("INICIALIZADOR DE CHROMADB")
     print("=" * 40)
     
     try:
         print("Creando pipeline RAG...")
-        rag = create_rag_pipeline(reset_collection=args.force)
+        rag = create_rag_pipeline(
+            reset_collection=args.force,
+            embedding_batch_size=args.embedding_batch_size,
+            embedding_max_seq_length=256
+        )
         
         if not args.force:
             print("Verificando contenido existente...")
@@ -36,11 +50,13 @@ def main():
         print("   Directorio: ./docs")
         print("   Formatos: PDF, TXT, TEX")
         print("   Saltando errores: Sí")
+        print(f"   Procesos: {args.workers}")
         
         load_result = rag.load_materials(
             data_directory="./docs",
             file_extensions=[".pdf", ".txt", ".tex"],
-            skip_on_error=True
+            skip_on_error=True,
+            workers=args.workers
         )
         
         print("\n" + "=" * 40)
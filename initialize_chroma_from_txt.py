@@ -6,19 +6,26 @@ Uso: python initialize_chroma_from_txt.py [--force]
 """
 
 import argparse
+import os
 import sys
 from pathlib import Path
 
 # Agregar el directorio src al path
 sys.path.append(str(Path(__file__).parent / "src"))
 
-from src.rag_pipeline import create_rag_pipeline
-
 def main():
     parser = argparse.ArgumentParser(description='Inicializar ChromaDB con documentos académicos desde archivos TXT')
     parser.add_argument('--force', '-f', 
                        action='store_true',
                        help='Forzar recarga de todos los documentos (elimina datos existentes)')
+    parser.add_argument('--workers', '-w',
+                       type=int,
+                       default=1,
+                       help='Procesos para parsear archivos en paralelo (default: 1, secuencial)')
+    parser.add_argument('--embedding-batch-size',
+                       type=int,
+                       default=256,
+                       help='Tamaño de batch para generar embeddings (default: 256)')
     parser.add_argument('--directory', '-d',
                        default='./docstxt',
                        help='Directorio de documentos TXT (default: ./docstxt)')
@@ -29,15 +36,22 @@ def main():
     print("=" * 50)
     
     # Verificar que el directorio existe
-    txt_dir = Path(args.directory)
-    if not txt_dir.exists():
+    if not os.path.isdir(args.directory):
         print(f"ERROR: El directorio {args.directory} no existe")
         print("Asegúrate de haber convertido los PDFs a TXT primero")
         sys.exit(1)
     
+    # Import diferido: src carga ChromaDB y el modelo de embeddings, así que
+    # --help, los errores de argumentos y un directorio inexistente no deben pagar ese costo
+    from src.rag_pipeline import create_rag_pipeline
+    
     try:
         print("Creando pipeline RAG...")
-        rag = create_rag_pipeline(reset_collection=args.force)
+        rag = create_rag_pipeline(
+            reset_collection=args.force,
+            embedding_batch_size=args.embedding_batch_size,
+            embedding_max_seq_length=256
+        )
         
         if not args.force:
             print("Verificando contenido existente...")
@@ -47,11 +61,13 @@ def main():
         print(f"   Directorio: {args.directory}")
         print(f"   Formatos: TXT únicamente")
         print(f"   Saltando errores: Sí")
+        print(f"   Procesos: {args.workers}")
         
         load_result = rag.load_materials(
             data_directory=args.directory,
             file_extensions=[".txt"],
-            skip_on_error=True
+            skip_on_error=True,
+            workers=args.workers
         )
         
         print("\n" + "=" * 50)
@@ -80,6 +96,7 @@ def main():
         
         if load_result.get('sources'):
             print(f"\nFUENTES TXT CARGADAS ({len(load_result.get('sources', []))}):")
+            txt_dir = Path(args.directory)
             for i, source in enumerate(load_result.get('sources', [])[:10], 1):
                 # Mostrar solo el nombre relativo del archivo
                 source_path = Path(source)
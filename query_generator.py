@@ -16,97 +16,110 @@ sys.path.append(str(Path(__file__).parent / "src"))
 from src.rag_pipeline import create_rag_pipeline
 from src.export_utils import ExerciseExporter
 
+# Opciones de los menús del constructor (inmutables)
+MATERIAS = (
+    "Sistemas de Inteligencia Artificial",
+    "Probabilidad y estadística"
+)
+
+TIPOS_CONSULTA = (
+    "evaluacion",
+    "unidad"
+)
+
+TIPOS_EXAMEN = (
+    "primer_parcial",
+    "segundo_parcial", 
+    "final",
+    "recuperatorio"
+)
+
+UNIDADES = {
+    "Sistemas de Inteligencia Artificial": (
+        "Introducción",
+        "Agentes y Ambientes",
+        "Métodos de búsqueda desinformados",
+        "Métodos de Búsqueda Informados",
+        "Algorítmos de Mejoramiento Iterativo",
+        "Algoritmos Genéticos",
+        "Optimización No Lineal",
+        "Perceptrón Simple Escalón",
+        "Perceptrón Lineal y No Lineal",
+        "Perceptrón Multicapa",
+        "Métricas y Sobreajuste",
+        "Introducción Aprendizaje No Supervisado",
+        "Modelo de Kohonen",
+        "Autovalores y Autovectores",
+        "PCA",
+        "Regla de Oja y Sanger",
+        "Modelo de Hopfield",
+        "Deep Learning",
+        "Autoencoders",
+        "Redes Neuronales Convolucionales",
+        "Redes Generativas Adversariales",
+        "Transformers"
+    ),
+    "Probabilidad y estadística": (
+        "Introducción",
+        "Estadística Descriptiva",
+        "Axiomas",
+        "Laplace",
+        "Variable Aleatoria Discreta",
+        "Variables Aleatorias Discretas Notables",
+        "Variable Aleatoria Continua",
+        "Distribución Normal",
+        "Variable Aleatoria Continua (2)",
+        "Función de Variable Aleatoria",
+        "Mezcla de Variables Aleatorias",
+        "Variables Aleatorias Bidimensionales Discretas",
+        "Variables Aleatorias Bidimensionales Continuas",
+        "Suma de Variables Aleatorias Independientes",
+        "Teorema Central Del Límite",
+        "Estimación",
+        "Intervalos de Confianza",
+        "Intervalos de Confianza para la Media - Distribución T",
+        "Tesis de Hipótesis",
+        "Tesis de Hipótesis (2)",
+        "Tesis de Hipótesis sobre la media con desvío desconocido",
+        "Tesis de Hipótesis sobre la proporción poblacional",
+        "Procesos Estocásticos",
+        "Cadenas de Markov"
+    )
+}
+
+NIVELES_DIFICULTAD = (
+    "basico",
+    "intermedio", 
+    "avanzado"
+)
+
+TIPOS_EJERCICIO = (
+    "multiple_choice",
+    "desarrollo",
+    "practico",
+    "teorico"
+)
+
+FORMATOS = (
+    "txt",
+    "pdf",
+    "tex"
+)
+
+
 class QueryBuilder:
+    # Opciones de los menús: constantes del módulo compartidas por todas las instancias
+    materias = MATERIAS
+    tipos_consulta = TIPOS_CONSULTA
+    tipos_examen = TIPOS_EXAMEN
+    unidades = UNIDADES
+    niveles_dificultad = NIVELES_DIFICULTAD
+    tipos_ejercicio = TIPOS_EJERCICIO
+    formatos = FORMATOS
+    
     def __init__(self):
+        # Único estado mutable por instancia: la consulta que se va armando
         self.query = {}
-        self.materias = [
-            "Sistemas de Inteligencia Artificial",
-            "Probabilidad y estadística"
-        ]
-        
-        self.tipos_consulta = [
-            "evaluacion",
-            "unidad"
-        ]
-        
-        self.tipos_examen = [
-            "primer_parcial",
-            "segundo_parcial", 
-            "final",
-            "recuperatorio"
-        ]
-        
-        self.unidades = {
-            "Sistemas de Inteligencia Artificial": [
-                "Introducción",
-                "Agentes y Ambientes",
-                "Métodos de búsqueda desinformados",
-                "Métodos de Búsqueda Informados",
-                "Algorítmos de Mejoramiento Iterativo",
-                "Algoritmos Genéticos",
-                "Optimización No Lineal",
-                "Perceptrón Simple Escalón",
-                "Perceptrón Lineal y No Lineal",
-                "Perceptrón Multicapa",
-                "Métricas y Sobreajuste",
-                "Introducción Aprendizaje No Supervisado",
-                "Modelo de Kohonen",
-                "Autovalores y Autovectores",
-                "PCA",
-                "Regla de Oja y Sanger",
-                "Modelo de Hopfield",
-                "Deep Learning",
-                "Autoencoders",
-                "Redes Neuronales Convolucionales",
-                "Redes Generativas Adversariales",
-                "Transformers"
-            ],
-            "Probabilidad y estadística": [
-                "Introducción",
-                "Estadística Descriptiva",
-                "Axiomas",
-                "Laplace",
-                "Variable Aleatoria Discreta",
-                "Variables Aleatorias Discretas Notables",
-                "Variable Aleatoria Continua",
-                "Distribución Normal",
-                "Variable Aleatoria Continua (2)",
-                "Función de Variable Aleatoria",
-                "Mezcla de Variables Aleatorias",
-                "Variables Aleatorias Bidimensionales Discretas",
-                "Variables Aleatorias Bidimensionales Continuas",
-                "Suma de Variables Aleatorias Independientes",
-                "Teorema Central Del Límite",
-                "Estimación",
-                "Intervalos de Confianza",
-                "Intervalos de Confianza para la Media - Distribución T",
-                "Tesis de Hipótesis",
-                "Tesis de Hipótesis (2)",
-                "Tesis de Hipótesis sobre la media con desvío desconocido",
-                "Tesis de Hipótesis sobre la proporción poblacional",
-                "Procesos Estocásticos",
-                "Cadenas de Markov"
-            ]
-        }
-        
-        self.niveles_dificultad = [
-            "basico",
-            "intermedio", 
-            "avanzado"
-        ]
-        
-        self.tipos_ejercicio = [
-            "multiple_choice",
-            "desarrollo",
-            "practico",
-            "teorico"
-        ]
-        
-        self.formatos = [
-            "txt",
-            "pdf",
-            "tex"
-        ]
 
     def mostrar_paso(self, paso, total):
         """Muestra el progreso del constructor"""
@@ -114,59 +127,46 @@ class QueryBuilder:
         print(f"    CONSTRUCTOR DE CONSULTAS - PASO {paso}/{total}")
         print("="*60)
 
-    def seleccionar_materia(self):
-        """Permite seleccionar una materia de la lista"""
-        print("📚 MATERIAS DISPONIBLES:")
-        for i, materia in enumerate(self.materias, 1):
-            print(f"   {i}) {materia}")
+    def _prompt_choice(self, titulo, opciones, que):
+        """Muestra un menú numerado y pide una opción hasta que sea válida"""
+        print(titulo)
+        for i, opcion in enumerate(opciones, 1):
+            print(f"   {i}) {opcion}")
         
         while True:
             try:
-                opcion = int(input("\n👉 Ingrese el número de la materia: "))
-                if 1 <= opcion <= len(self.materias):
-                    self.query['materia'] = self.materias[opcion - 1]
-                    print(f"✅ Materia seleccionada: {self.materias[opcion - 1]}")
-                    return
-                else:
-                    print("❌ Opción inválida. Intente nuevamente.")
+                opcion = int(input(f"\n👉 Ingrese el número {que}: "))
+                if 1 <= opcion <= len(opciones):
+                    return opciones[opcion - 1]
+                print("❌ Opción inválida. Intente nuevamente.")
             except ValueError:
                 print("❌ Por favor ingrese un número válido.")
 
-    def seleccionar_tipo_consulta(self):
-        """Permite seleccionar el tipo de consulta"""
-        print("🎯 TIPO DE CONSULTA:")
-        for i, tipo in enumerate(self.tipos_consulta, 1):
-            print(f"   {i}) {tipo}")
-        
+    def _prompt_int(self, mensaje):
+        """Pide un entero mayor a 0 hasta que sea válido"""
         while True:
             try:
-                opcion = int(input("\n👉 Ingrese el número del tipo: "))
-                if 1 <= opcion <= len(self.tipos_consulta):
-                    self.query['tipo_consulta'] = self.tipos_consulta[opcion - 1]
-                    print(f"✅ Tipo seleccionado: {self.tipos_consulta[opcion - 1]}")
-                    return
-                else:
-                    print("❌ Opción inválida. Intente nuevamente.")
+                valor = int(input(f"\n👉 {mensaje}: "))
+                if valor > 0:
+                    return valor
+                print("❌ La cantidad debe ser mayor a 0.")
             except ValueError:
                 print("❌ Por favor ingrese un número válido.")
 
+    def seleccionar_materia(self):
+        """Permite seleccionar una materia de la lista"""
+        self.query['materia'] = self._prompt_choice("📚 MATERIAS DISPONIBLES:", self.materias, "de la materia")
+        print(f"✅ Materia seleccionada: {self.query['materia']}")
+
+    def seleccionar_tipo_consulta(self):
+        """Permite seleccionar el tipo de consulta"""
+        self.query['tipo_consulta'] = self._prompt_choice("🎯 TIPO DE CONSULTA:", self.tipos_consulta, "del tipo")
+        print(f"✅ Tipo seleccionado: {self.query['tipo_consulta']}")
+
     def seleccionar_tipo_examen(self):
         """Permite seleccionar el tipo de examen"""
-        print("📚 TIPO DE EXAMEN:")
-        for i, tipo in enumerate(self.tipos_examen, 1):
-            print(f"   {i}) {tipo}")
-        
-        while True:
-            try:
-                opcion = int(input("\n👉 Ingrese el número del tipo: "))
-                if 1 <= opcion <= len(self.tipos_examen):
-                    self.query['tipo_examen'] = self.tipos_examen[opcion - 1]
-                    print(f"✅ Tipo seleccionado: {self.tipos_examen[opcion - 1]}")
-                    return
-                else:
-                    print("❌ Opción inválida. Intente nuevamente.")
-            except ValueError:
-                print("❌ Por favor ingrese un número válido.")
+        self.query['tipo_examen'] = self._prompt_choice("📚 TIPO DE EXAMEN:", self.tipos_examen, "del tipo")
+        print(f"✅ Tipo seleccionado: {self.query['tipo_examen']}")
 
     def seleccionar_unidad(self):
         """Permite seleccionar una unidad de la materia seleccionada"""
@@ -174,94 +174,34 @@ class QueryBuilder:
             print("❌ Primero debe seleccionar una materia.")
             return
         
-        print(f"📖 UNIDADES DE {self.query['materia'].upper()}:")
-        unidades = self.unidades.get(self.query['materia'], ["Unidad no disponible"])
-        
-        for i, unidad in enumerate(unidades, 1):
-            print(f"   {i}) {unidad}")
-        
-        while True:
-            try:
-                opcion = int(input("\n👉 Ingrese el número de la unidad: "))
-                if 1 <= opcion <= len(unidades):
-                    self.query['unidad'] = unidades[opcion - 1]
-                    print(f"✅ Unidad seleccionada: {unidades[opcion - 1]}")
-                    return
-                else:
-                    print("❌ Opción inválida. Intente nuevamente.")
-            except ValueError:
-                print("❌ Por favor ingrese un número válido.")
+        unidades = self.unidades.get(self.query['materia'], ("Unidad no disponible",))
+        self.query['unidad'] = self._prompt_choice(f"📖 UNIDADES DE {self.query['materia'].upper()}:",
+                                                   unidades, "de la unidad")
+        print(f"✅ Unidad seleccionada: {self.query['unidad']}")
 
     def seleccionar_cantidad(self):
         """Permite seleccionar la cantidad de ejercicios"""
         print("🔢 CANTIDAD DE EJERCICIOS:")
         print("   Ingresa la cantidad de ejercicios que deseas generar")
         
-        while True:
-            try:
-                cantidad = int(input("\n👉 Ingrese la cantidad de ejercicios: "))
-                if cantidad > 0:
-                    self.query['cantidad'] = cantidad
-                    print(f"✅ Cantidad seleccionada: {cantidad} ejercicios")
-                    return
-                else:
-                    print("❌ La cantidad debe ser mayor a 0.")
-            except ValueError:
-                print("❌ Por favor ingrese un número válido.")
+        self.query['cantidad'] = self._prompt_int("Ingrese la cantidad de ejercicios")
+        print(f"✅ Cantidad seleccionada: {self.query['cantidad']} ejercicios")
 
     def seleccionar_nivel_dificultad(self):
         """Permite seleccionar el nivel de dificultad"""
-        print("📊 NIVEL DE DIFICULTAD:")
-        for i, nivel in enumerate(self.niveles_dificultad, 1):
-            print(f"   {i}) {nivel}")
-        
-        while True:
-            try:
-                opcion = int(input("\n👉 Ingrese el número del nivel: "))
-                if 1 <= opcion <= len(self.niveles_dificultad):
-                    self.query['nivel_dificultad'] = self.niveles_dificultad[opcion - 1]
-                    print(f"✅ Nivel seleccionado: {self.niveles_dificultad[opcion - 1]}")
-                    return
-                else:
-                    print("❌ Opción inválida. Intente nuevamente.")
-            except ValueError:
-                print("❌ Por favor ingrese un número válido.")
+        self.query['nivel_dificultad'] = self._prompt_choice("📊 NIVEL DE DIFICULTAD:", self.niveles_dificultad,
+                                                             "del nivel")
+        print(f"✅ Nivel seleccionado: {self.query['nivel_dificultad']}")
 
     def seleccionar_tipo_ejercicio(self):
         """Permite seleccionar el tipo de ejercicio"""
-        print("📝 TIPO DE EJERCICIO:")
-        for i, tipo in enumerate(self.tipos_ejercicio, 1):
-            print(f"   {i}) {tipo}")
-        
-        while True:
-            try:
-                opcion = int(input("\n👉 Ingrese el número del tipo: "))
-                if 1 <= opcion <= len(self.tipos_ejercicio):
-                    self.query['tipo_ejercicio'] = self.tipos_ejercicio[opcion - 1]
-                    print(f"✅ Tipo seleccionado: {self.tipos_ejercicio[opcion - 1]}")
-                    return
-                else:
-                    print("❌ Opción inválida. Intente nuevamente.")
-            except ValueError:
-                print("❌ Por favor ingrese un número válido.")
+        self.query['tipo_ejercicio'] = self._prompt_choice("📝 TIPO DE EJERCICIO:", self.tipos_ejercicio, "del tipo")
+        print(f"✅ Tipo seleccionado: {self.query['tipo_ejercicio']}")
 
     def seleccionar_formato(self):
         """Permite seleccionar el formato de salida"""
-        print("📄 FORMATO DE SALIDA:")
-        for i, formato in enumerate(self.formatos, 1):
-            print(f"   {i}) {formato}")
-        
-        while True:
-            try:
-                opcion = int(input("\n👉 Ingrese el número del formato: "))
-                if 1 <= opcion <= len(self.formatos):
-                    self.query['formato'] = self.formatos[opcion - 1]
-                    print(f"✅ Formato seleccionado: {self.formatos[opcion - 1]}")
-                    return
-                else:
-                    print("❌ Opción inválida. Intente nuevamente.")
-            except ValueError:
-                print("❌ Por favor ingrese un número válido.")
+        self.query['formato'] = self._prompt_choice("📄 FORMATO DE SALIDA:", self.formatos, "del formato")
+        print(f"✅ Formato seleccionado: {self.query['formato']}")
 
     def ingresar_consulta_libre(self):
         """Permite ingresar una consulta libre"""
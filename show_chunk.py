@@ -1,106 +1,134 @@
 #!/usr/bin/env python3
 """
 Script para mostrar un chunk del ChromaDB y todos sus campos de metadata
+Uso: python show_chunk.py [--subject {prob,ia,all}]
 """
 
+import argparse
+import os
 import sys
-from pathlib import Path
+import traceback
+from concurrent.futures import ThreadPoolExecutor
 
-# Agregar el directorio src al path
-sys.path.append(str(Path(__file__).parent / "src"))
+SEP = "=" * 60
 
-from src.rag_pipeline import create_rag_pipeline
+# Materia: (valor del filtro, encabezado, etiqueta corta)
+SUBJECTS = {
+    "prob": ("Probabilidad y estadística", "PROBABILIDAD Y ESTADÍSTICA", "PROBABILIDAD"),
+    "ia": ("Sistemas de Inteligencia Artificial", "SISTEMAS DE INTELIGENCIA ARTIFICIAL", "IA"),
+}
+
+# Consultas de cada materia, en el orden de KINDS
+QUERIES = {
+    "prob": ["probabilidad variables aleatorias", "guía ejercicios probabilidad", "examen probabilidad estadística"],
+    "ia": ["machine learning redes neuronales", "guía ejercicios inteligencia artificial", "examen inteligencia artificial"],
+}
+
+# Tipo de material: (nombre, título, nombre en minúsculas)
+KINDS = [
+    ("Teoría", "TEORÍA", "teoría"),
+    ("Guía", "GUÍA", "guía"),
+    ("Examen", "EXAMEN", "examen"),
+]
 
 def show_chunk_details(chunk, title):
-    """Muestra los detalles de un chunk"""
-    print(f"\n📄 {title}:")
-    print("="*60)
-    print(f"📝 Contenido:")
-    print(f"   {chunk['content'][:300]}...")
-    print(f"\n📊 METADATA COMPLETA:")
-    print("="*60)
+    """Muestra los detalles de un chunk (en una sola escritura a stdout)"""
+    content = chunk.content
+    metadata = chunk.metadata
     
-    for key, value in chunk['metadata'].items():
-        print(f"   🔹 {key}: {value}")
-        
-    print(f"\n📈 INFORMACIÓN ADICIONAL:")
-    print(f"   - Longitud del contenido: {len(chunk['content'])} caracteres")
-    print(f"   - Número de campos de metadata: {len(chunk['metadata'])}")
+    parts = [
+        f"\n📄 {title}:",
+        SEP,
+        "📝 Contenido:",
+        f"   {content[:300]}...",
+        "\n📊 METADATA COMPLETA:",
+        SEP,
+    ]
+    parts.extend(f"   🔹 {key}: {value}" for key, value in metadata.items())
+    parts.append("\n📈 INFORMACIÓN ADICIONAL:")
+    parts.append(f"   - Longitud del contenido: {len(content)} caracteres")
+    parts.append(f"   - Número de campos de metadata: {len(metadata)}")
+    
+    sys.stdout.write("\n".join(parts) + "\n")
+
+def _load_retriever():
+    """
+    Importa y construye la parte de búsqueda del pipeline (sin generador):
+    LangChain, ChromaDB y el modelo de embeddings son lo más lento del script
+    """
+    from src.rag_pipeline import create_retriever_only
+    return create_retriever_only(use_embedding_cache=True)
+
+def _chroma_error():
+    """ChromaError sin importar chromadb de antemano (se evalúa solo ante un error)"""
+    try:
+        from chromadb.errors import ChromaError
+        return ChromaError
+    except ImportError:
+        return RuntimeError
 
 def main():
+    parser = argparse.ArgumentParser(description='Mostrar chunks del ChromaDB con toda su metadata')
+    parser.add_argument('--subject', '-s',
+                       choices=['prob', 'ia', 'all'],
+                       default='all',
+                       help='Materia a mostrar (default: all)')
+    
+    args = parser.parse_args()
+    subjects = list(QUERIES) if args.subject == 'all' else [args.subject]
+    
+    # Cargar el sistema RAG en segundo plano mientras se imprimen los banners
+    loader = ThreadPoolExecutor(max_workers=1)
+    rag_future = loader.submit(_load_retriever)
+    loader.shutdown(wait=False)
+    
     print("🔍 Mostrando chunks del ChromaDB...")
-    print("="*60)
+    print(SEP)
+    print("📦 Cargando sistema RAG...")
     
     try:
-        # Crear pipeline RAG
-        print("📦 Cargando sistema RAG...")
-        rag = create_rag_pipeline()
+        rag = rag_future.result()
         
-        # Buscar chunks por materia y tipo
-        print("🔎 Buscando chunks de PROBABILIDAD Y ESTADÍSTICA...")
-        prob_theory = rag.search_materials(query="probabilidad variables aleatorias", k=2, filter_dict={"materia": "Probabilidad y estadística"})
-        prob_guide = rag.search_materials(query="guía ejercicios probabilidad", k=2, filter_dict={"materia": "Probabilidad y estadística"})
-        prob_exam = rag.search_materials(query="examen probabilidad estadística", k=2, filter_dict={"materia": "Probabilidad y estadística"})
+        # Buscar chunks por materia y tipo: una búsqueda por lote por materia,
+        # todas en paralelo (son independientes)
+        for subject in subjects:
+            print(f"🔎 Buscando chunks de {SUBJECTS[subject][1]}...")
+        with ThreadPoolExecutor(max_workers=len(subjects)) as executor:
+            futures = {
+                subject: executor.submit(
+                    rag.search_materials_batch,
+                    queries=QUERIES[subject],
+                    k=2,
+                    filter_dict={"materia": SUBJECTS[subject][0]}
+                )
+                for subject in subjects
+            }
+            results = {subject: future.result() for subject, future in futures.items()}
         
-        print("🔎 Buscando chunks de SISTEMAS DE INTELIGENCIA ARTIFICIAL...")
-        ia_theory = rag.search_materials(query="machine learning redes neuronales", k=2, filter_dict="materia=Sistemas de Inteligencia Artificial")
-        ia_guide = rag.search_materials(query="guía ejercicios inteligencia artificial", k=2, filter_dict={"materia": "Sistemas de Inteligencia Artificial"})
-        ia_exam = rag.search_materials(query="examen inteligencia artificial", k=2, filter_dict={"materia": "Sistemas de Inteligencia Artificial"})
-        
-        # Mostrar resultados de Probabilidad y Estadística
-        print("\n" + "="*60)
-        print("📊 PROBABILIDAD Y ESTADÍSTICA")
-        print("="*60)
-        
-        if prob_theory:
-            print(f"✅ Teoría: {len(prob_theory)} chunks")
-            show_chunk_details(prob_theory[0], "TEORÍA - PROBABILIDAD")
-        else:
-            print("❌ No se encontraron chunks de teoría")
-        
-        if prob_guide:
-            print(f"✅ Guía: {len(prob_guide)} chunks")
-            show_chunk_details(prob_guide[0], "GUÍA - PROBABILIDAD")
-        else:
-            print("❌ No se encontraron chunks de guía")
-        
-        if prob_exam:
-            print(f"✅ Examen: {len(prob_exam)} chunks")
-            show_chunk_details(prob_exam[0], "EXAMEN - PROBABILIDAD")
-        else:
-            print("❌ No se encontraron chunks de examen")
-        
-        # Mostrar resultados de Sistemas de IA
-        print("\n" + "="*60)
-        print("📊 SISTEMAS DE INTELIGENCIA ARTIFICIAL")
-        print("="*60)
-        
-        if ia_theory:
-            print(f"✅ Teoría: {len(ia_theory)} chunks")
-            show_chunk_details(ia_theory[0], "TEORÍA - IA")
-        else:
-            print("❌ No se encontraron chunks de teoría")
-        
-        if ia_guide:
-            print(f"✅ Guía: {len(ia_guide)} chunks")
-            show_chunk_details(ia_guide[0], "GUÍA - IA")
-        else:
-            print("❌ No se encontraron chunks de guía")
-        
-        if ia_exam:
-            print(f"✅ Examen: {len(ia_exam)} chunks")
-            show_chunk_details(ia_exam[0], "EXAMEN - IA")
-        else:
-            print("❌ No se encontraron chunks de examen")
+        # Mostrar resultados de cada materia
+        for subject in subjects:
+            _, header, label = SUBJECTS[subject]
+            print("\n" + SEP)
+            print(f"📊 {header}")
+            print(SEP)
+            
+            for (name, title, lower), chunks in zip(KINDS, results[subject]):
+                if chunks:
+                    print(f"✅ {name}: {len(chunks)} chunks")
+                    show_chunk_details(chunks[0], f"{title} - {label}")
+                else:
+                    print(f"❌ No se encontraron chunks de {lower}")
         
         # Verificar si no hay nada
-        total_results = len(prob_theory) + len(prob_guide) + len(prob_exam) + len(ia_theory) + len(ia_guide) + len(ia_exam)
+        total_results = sum(len(chunks) for subject_results in results.values() for chunks in subject_results)
         if total_results == 0:
             print("\n💡 Posiblemente el ChromaDB no está inicializado")
             print("   Ejecuta: python initialize_chroma.py")
             
-    except Exception as e:
-        print(f"❌ Error: {str(e)}")
+    except (ImportError, RuntimeError, _chroma_error()) as e:
+        print(f"❌ Error: {e!r}")
+        if os.environ.get("RAG_DEBUG"):
+            traceback.print_exc()
 
 if __name__ == "__main__":
     main()
@@ -13,56 +13,74 @@ Módulos principales:
 - query_utils: Utilidades para consultas
 """
 
-from .rag_pipeline import RAGPipeline, create_rag_pipeline
-from .generator import ExerciseGenerator
-from .retriever import Retriever, create_retriever
-from .vector_store import VectorStore, create_vector_store
-from .data_loading import DocumentLoader
-from .text_processing import AcademicTextSplitter, split_documents
-from .query_utils import prepare_search_query
-from .export_utils import ExerciseExporter, export_exercises
+import importlib
+
+# Los submódulos se importan recién al acceder a sus símbolos (PEP 562): así
+# un script que usa un solo componente no paga la carga de LangChain, ChromaDB,
+# torch y RAGAS completos
+_LAZY = {
+    'RAGPipeline': 'rag_pipeline',
+    'create_rag_pipeline': 'rag_pipeline',
+    'RetrievalPipeline': 'rag_pipeline',
+    'create_retriever_only': 'rag_pipeline',
+    'SearchResult': 'rag_pipeline',
+    'ExerciseGenerator': 'generator',
+    'Retriever': 'retriever',
+    'create_retriever': 'retriever',
+    'VectorStore': 'vector_store',
+    'create_vector_store': 'vector_store',
+    'DocumentLoader': 'data_loading',
+    'AcademicTextSplitter': 'text_processing',
+    'split_documents': 'text_processing',
+    'prepare_search_query': 'query_utils',
+    'ExerciseExporter': 'export_utils',
+    'export_exercises': 'export_utils',
+    'RAGEvaluator': 'evaluation',
+    'create_evaluator': 'evaluation',
+}
+
+__all__ = [
+    # Main pipeline
+    'RAGPipeline',
+    'create_rag_pipeline',
+    'RetrievalPipeline',
+    'create_retriever_only',
+    'SearchResult',
+    # Components
+    'ExerciseGenerator',
+    'Retriever',
+    'create_retriever',
+    'VectorStore',
+    'create_vector_store',
+    'DocumentLoader',
+    'AcademicTextSplitter',
+    'split_documents',
+    'RAGEvaluator',
+    'create_evaluator',
+    'prepare_search_query',
+    'ExerciseExporter',
+    'export_exercises'
+]
+
+
+def __getattr__(name):
+    """Importa el submódulo de `name` en el primer acceso y cachea el símbolo"""
+    module_name = _LAZY.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    
+    # Si faltan las dependencias del submódulo (p. ej. RAGAS para evaluation)
+    # el ImportError se propaga recién acá, al usar el símbolo
+    module = importlib.import_module(f".{module_name}", __name__)
+    value = getattr(module, name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    """Incluye los símbolos perezosos en dir() y en el autocompletado"""
+    return sorted(set(globals()) | set(__all__))
 
-# Importación condicional de evaluation para evitar errores de dependencias
-try:
-    from .evaluation import RAGEvaluator, create_evaluator
-    __all__ = [
-        # Main pipeline
-        'RAGPipeline',
-        'create_rag_pipeline',
-        # Components
-        'ExerciseGenerator',
-        'Retriever',
-        'create_retriever',
-        'VectorStore',
-        'create_vector_store',
-        'DocumentLoader',
-        'AcademicTextSplitter',
-        'split_documents',
-        'RAGEvaluator',
-        'create_evaluator',
-        'prepare_search_query',
-        'ExerciseExporter',
-        'export_exercises'
-    ]
-except ImportError as e:
-    # Si falla la importación de evaluation (por falta de RAGAS u otras deps)
-    __all__ = [
-        # Main pipeline
-        'RAGPipeline',
-        'create_rag_pipeline',
-        # Components
-        'ExerciseGenerator',
-        'Retriever',
-        'create_retriever',
-        'VectorStore',
-        'create_vector_store',
-        'DocumentLoader',
-        'AcademicTextSplitter',
-        'split_documents',
-        'prepare_search_query',
-        'ExerciseExporter',
-        'export_exercises'
-    ]
 
 __version__ = '2.0.0'
 __author__ = 'Deep Learning TP2 - ITBA'
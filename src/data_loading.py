@@ -5,6 +5,7 @@ Soporte para carga de documentos PDF, TXT y TEX con extracción de metadata
 
 import os
 import logging
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from typing import List, Dict, Any, Optional
 from langchain_community.document_loaders import (
@@ -19,6 +20,26 @@ from .query_utils import normalize_text
 logger = logging.getLogger(__name__)
 
 
+def _load_file(
+    file_path: str,
+    supported_extensions: List[str],
+    metadata_extractor: Optional[callable] = None
+) -> List[Document]:
+    """
+    Carga un archivo en un proceso del pool de load_documents_from_directory
+    
+    Args:
+        file_path: Ruta del archivo
+        supported_extensions: Extensiones soportadas por el loader
+        metadata_extractor: Función para extraer metadata personalizada
+        
+    Returns:
+        Lista de documentos del archivo
+    """
+    loader = DocumentLoader(supported_extensions)
+    return loader.load_single_document(Path(file_path), metadata_extractor)
+
+
 class DocumentLoader:
     """
     Clase para cargar documentos de diferentes formatos con metadata enriquecida
@@ -41,14 +62,21 @@ class DocumentLoader:
     def load_documents_from_directory(
         self, 
         directory_path: str, 
-        metadata_extractor: Optional[callable] = None
+        metadata_extractor: Optional[callable] = None,
+        workers: Optional[int] = 1
     ) -> List[Document]:
         """
         Carga todos los documentos de un directorio
         
+        Con workers > 1 cada archivo se parsea en un proceso separado
+        (ProcessPoolExecutor); el orden del resultado se mantiene igual
+        al del recorrido secuencial.
+        
         Args:
             directory_path: Ruta del directorio
             metadata_extractor: Función para extraer metadata personalizada
+            workers: Procesos para parsear archivos en paralelo
+                     (1 = secuencial, None = os.cpu_count())
             
         Returns:
             Lista de documentos con metadata
@@ -60,14 +88,38 @@ class DocumentLoader:
             logger.error(f"Directorio no encontrado: {directory_path}")
             return documents
         
-        for file_path in directory.rglob('*'):
-            if file_path.is_file() and file_path.suffix.lower() in self.supported_extensions:
+        files = [
+            file_path for file_path in directory.rglob('*')
+            if file_path.is_file() and file_path.suffix.lower() in self.supported_extensions
+        ]
+        
+        if workers is None:
+            workers = os.cpu_count() or 1
+        workers = max(1, min(workers, len(files)))
+        
+        if workers == 1:
+            for file_path in files:
                 try:
                     docs = self.load_single_document(file_path, metadata_extractor)
                     documents.extend(docs)
                     logger.info(f"Documento cargado: {file_path}")
                 except Exception as e:
                     logger.error(f"Error cargando {file_path}: {str(e)}")
+        else:
+            # A cada worker se le envía una función de módulo con argumentos
+            # simples; el extractor también viaja, así que debe ser picklable
+            # (función de módulo o método de DocumentLoader)
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [
+                    executor.submit(_load_file, str(file_path), self.supported_extensions, metadata_extractor)
+                    for file_path in files
+                ]
+                for file_path, future in zip(files, futures):
+                    try:
+                        documents.extend(future.result())
+                        logger.info(f"Documento cargado: {file_path}")
+                    except Exception as e:
+                        logger.error(f"Error cargando {file_path}: {str(e)}")
         
         logger.info(f"Total documentos cargados: {len(documents)}")
         return documents
@@ -0,0 +1,171 @@
+"""
+Embedding Cache Module
+Cache persistente en disco de embeddings de consultas (SQLite)
+"""
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+from array import array
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingCache:
+    """
+    Cache de embeddings de consultas en una tabla SQLite, direccionada por
+    SHA-256 de "modelo::consulta"; los vectores se guardan como float32
+    """
+    
+    def __init__(self, path: str):
+        """
+        Abre (o crea) la cache
+        
+        Args:
+            path: Ruta del archivo SQLite
+        """
+        self.path = path
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        
+        # Los scripts pueden consultar desde más de un hilo
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings "
+            "(hash TEXT PRIMARY KEY, model TEXT, dim INT, vec BLOB)"
+        )
+        self._conn.commit()
+    
+    @staticmethod
+    def key(model_name: str, query: str) -> str:
+        """
+        Calcula la clave de una consulta para un modelo
+        
+        Args:
+            model_name: Nombre del modelo de embeddings
+            query: Consulta de búsqueda
+        
+        Returns:
+            Hash SHA-256 en hexadecimal
+        """
+        return hashlib.sha256(f"{model_name}::{query.strip()}".encode("utf-8")).hexdigest()
+    
+    def get_or_compute(
+        self,
+        model_name: str,
+        queries: List[str],
+        compute: Callable[[List[str]], List[List[float]]]
+    ) -> List[List[float]]:
+        """
+        Devuelve los embeddings de las consultas, calculando en una sola
+        llamada a `compute` solo los que no están en la cache
+        
+        Args:
+            model_name: Nombre del modelo de embeddings
+            queries: Consultas de búsqueda
+            compute: Función que calcula los embeddings de una lista de consultas
+        
+        Returns:
+            Embeddings de cada consulta, en el mismo orden
+        """
+        keys = [self.key(model_name, query) for query in queries]
+        
+        with self._lock:
+            found = {}
+            for key in set(keys):
+                row = self._conn.execute("SELECT vec FROM embeddings WHERE hash = ?", (key,)).fetchone()
+                if row is not None:
+                    found[key] = array('f', row[0]).tolist()
+        
+        missing = {}
+        for key, query in zip(keys, queries):
+            if key not in found:
+                missing.setdefault(key, query)
+        
+        if missing:
+            vectors = compute(list(missing.values()))
+            with self._lock:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (hash, model, dim, vec) VALUES (?, ?, ?, ?)",
+                    [(key, model_name, len(vec), array('f', vec).tobytes())
+                     for key, vec in zip(missing, vectors)]
+                )
+                self._conn.commit()
+            found.update(zip(missing, (list(vec) for vec in vectors)))
+        
+        logger.info(f"Cache de embeddings: {len(queries) - len(missing)} aciertos, {len(missing)} calculados")
+        return [found[key] for key in keys]
+    
+    def close(self):
+        """Cierra la conexión a la base de la cache"""
+        with self._lock:
+            self._conn.close()
+
+
+class CachedQueryEmbeddings(Embeddings):
+    """
+    Envoltorio de un modelo de embeddings de LangChain que cachea en disco
+    los embeddings de consultas; los de documentos se calculan siempre
+    """
+    
+    def __init__(self, embeddings: Embeddings, cache: EmbeddingCache, model_name: str):
+        """
+        Inicializa el envoltorio
+        
+        Args:
+            embeddings: Modelo de embeddings de LangChain
+            cache: Cache de embeddings de consultas
+            model_name: Nombre del modelo (parte de la clave de la cache)
+        """
+        self.embeddings = embeddings
+        self.cache = cache
+        self.model_name = model_name
+    
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Calcula los embeddings de documentos (sin cache)"""
+        return self.embeddings.embed_documents(texts)
+    
+    def embed_query(self, text: str) -> List[float]:
+        """Embedding de una consulta, desde la cache si ya fue calculado"""
+        return self.embed_queries([text])[0]
+    
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embeddings de varias consultas: solo se calculan las que no están
+        en la cache
+        """
+        return self.cache.get_or_compute(self.model_name, texts, self._compute_queries)
+    
+    def _compute_queries(self, texts: List[str]) -> List[List[float]]:
+        """
+        Calcula los embeddings de las consultas que no estaban en la cache,
+        siempre con embed_query: hay modelos que embeben distinto consultas y
+        documentos, y la cache no debe depender de cuántas faltaban
+        """
+        return [self.embeddings.embed_query(text) for text in texts]
+    
+    def __repr__(self) -> str:
+        return f"CachedQueryEmbeddings({self.embeddings!r})"
+
+
+def create_embedding_cache(path: Optional[str] = None, persist_directory: Optional[str] = None) -> EmbeddingCache:
+    """
+    Función de conveniencia para crear la cache de embeddings de consultas
+    
+    Args:
+        path: Ruta del archivo SQLite (por defecto de EMBEDDING_CACHE_PATH)
+        persist_directory: Directorio de ChromaDB, donde va la cache si no hay ruta
+    
+    Returns:
+        Instancia de la cache
+    """
+    path = path or os.getenv('EMBEDDING_CACHE_PATH') or str(
+        Path(persist_directory or './data/processed/chroma_db') / 'query_embeddings.sqlite3'
+    )
+    return EmbeddingCache(path)
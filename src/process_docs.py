@@ -15,7 +15,7 @@ import time
 # Agregar el directorio raíz al path para importar módulos
 sys.path.append(str(Path(__file__).parent.parent))
 
-from image_utils.pdf_to_text_unified import extract_text_with_blip_and_ocr
+from image_utils.pdf_to_text_unified import Extractor
 
 
 class DocsProcessor:
@@ -43,6 +43,23 @@ class DocsProcessor:
         # Extensiones soportadas
         self.supported_extensions = self.text_extensions | self.pdf_extensions
         
+        # Extractor BLIP + OCR, se carga con el primer PDF y se reutiliza
+        self._extractor = None
+        
+    @property
+    def extractor(self) -> Extractor:
+        """
+        Extractor compartido por todos los PDFs (los modelos se cargan una vez).
+        """
+        if self._extractor is None:
+            self._extractor = Extractor(
+                blip_model="Salesforce/blip-image-captioning-base",
+                ocr_languages='spa+eng',
+                dpi=300,
+                device="auto"
+            )
+        return self._extractor
+        
     def get_all_files(self) -> List[Tuple[Path, Path]]:
         """
         Obtiene todos los archivos soportados de docs y sus rutas destino.
@@ -116,17 +133,16 @@ class DocsProcessor:
             print(f"🔄 Procesando PDF: {source.name}")
             
             # Procesar PDF con BLIP + OCR
-            extracted_text = extract_text_with_blip_and_ocr(
+            # El texto se escribe directo en destination, sin acumularlo en memoria
+            self.extractor.extract(
                 pdf_path=str(source),
                 output_path=str(destination),
-                blip_model="Salesforce/blip-image-captioning-base",
-                ocr_languages='spa+eng',
-                dpi=300,
-                device="auto"
+                return_text=False
             )
             
-            if extracted_text.strip():
-                print(f"✅ Procesado: {source.name} -> {destination.name} ({len(extracted_text)} caracteres)")
+            output_size = destination.stat().st_size
+            if output_size:
+                print(f"✅ Procesado: {source.name} -> {destination.name} ({output_size} bytes)")
                 return True
             else:
                 print(f"⚠️  PDF procesado pero sin contenido: {source.name}")
@@ -196,6 +212,11 @@ class DocsProcessor:
                     stats["errors"] += 1
                     stats["pdf_errors"] += 1
         
+        # Liberar el pool de OCR del extractor compartido
+        if self._extractor is not None:
+            self._extractor.close()
+            self._extractor = None
+        
         # Mostrar estadísticas finales
         end_time = time.time()
         duration = end_time - start_time
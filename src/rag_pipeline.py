@@ -5,6 +5,7 @@ Pipeline principal de RAG usando LangChain
 
 import os
 import logging
+from dataclasses import dataclass
 from typing import Dict, Any, List, Optional
 from dotenv import load_dotenv
 
@@ -18,6 +19,8 @@ from langchain_core.documents import Document
 from .data_loading import DocumentLoader
 from .text_processing import TextProcessor
 from .vector_store import create_vector_store
+from .embedding_cache import create_embedding_cache
+from .semantic_query_cache import create_semantic_query_cache
 from .retriever import create_retriever
 from .generator import ExerciseGenerator
 from .query_utils import prepare_search_query, normalize_text
@@ -25,7 +28,174 @@ from .query_utils import prepare_search_query, normalize_text
 logger = logging.getLogger(__name__)
 
 
-class RAGPipeline:
+@dataclass(slots=True, frozen=True)
+class SearchResult:
+    """
+    Documento encontrado por una búsqueda de materiales
+    """
+    content: str
+    metadata: Dict[str, Any]
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Formato de diccionario anterior ({"content", "metadata"})
+        
+        Returns:
+            Diccionario con el contenido y la metadata
+        """
+        return {"content": self.content, "metadata": self.metadata}
+
+
+class RetrievalPipeline:
+    """
+    Solo la parte de búsqueda del pipeline (vector store + retriever), sin
+    generador ni procesamiento de documentos: para scripts que solo consultan
+    """
+    
+    def __init__(
+        self,
+        collection_name: str = None,
+        persist_directory: str = None,
+        embedding_model: str = None,
+        reset_collection: bool = False,
+        embedding_batch_size: Optional[int] = None,
+        embedding_max_seq_length: Optional[int] = None,
+        embedding_cache_path: Optional[str] = None,
+        use_embedding_cache: Optional[bool] = None,
+        use_semantic_cache: Optional[bool] = None
+    ):
+        """
+        Inicializa el vector store y el retriever
+        
+        Args:
+            collection_name: Nombre de la colección ChromaDB
+            persist_directory: Directorio de persistencia
+            embedding_model: Modelo de embeddings
+            reset_collection: Si resetear la colección
+            embedding_batch_size: Batch de encode de embeddings locales
+            embedding_max_seq_length: Tokens máximos por chunk al generar embeddings
+            embedding_cache_path: Archivo de la cache de embeddings de consultas
+                                  (por defecto EMBEDDING_CACHE_PATH, o dentro de persist_directory)
+            use_embedding_cache: Si cachear en disco los embeddings de consultas
+                                 (por defecto solo con embedding_cache_path o EMBEDDING_CACHE_PATH)
+            use_semantic_cache: Si reutilizar resultados de consultas similares
+                                (por defecto solo con SEMANTIC_CACHE definida)
+        """
+        # Leer valores de variables de entorno si no se especifican
+        self.collection_name = collection_name or os.getenv('CHROMA_COLLECTION_NAME', 'itba_ejercicios_collection')
+        self.persist_directory = persist_directory or os.getenv('CHROMA_PERSIST_DIRECTORY', './data/processed/chroma_db')
+        self.embedding_model = embedding_model or os.getenv('EMBEDDING_MODEL', 'all-MiniLM-L6-v2')
+        
+        # Cache en disco de embeddings de consultas: solo si se pide (los
+        # scripts que cargan documentos no consultan y no la necesitan)
+        if use_embedding_cache is None:
+            use_embedding_cache = bool(embedding_cache_path or os.getenv('EMBEDDING_CACHE_PATH'))
+        self.embedding_cache = None
+        if use_embedding_cache:
+            self.embedding_cache = create_embedding_cache(
+                path=embedding_cache_path,
+                persist_directory=self.persist_directory
+            )
+        
+        # Vector store
+        self.vector_store = create_vector_store(
+            collection_name=self.collection_name,
+            persist_directory=self.persist_directory,
+            embedding_model=self.embedding_model,
+            reset_collection=reset_collection,
+            embedding_batch_size=embedding_batch_size,
+            max_seq_length=embedding_max_seq_length,
+            embedding_cache=self.embedding_cache
+        )
+        
+        # Cache semántica de resultados: opcional, una consulta parecida
+        # devuelve los resultados de otra en lugar de los suyos
+        if use_semantic_cache is None:
+            use_semantic_cache = bool(os.getenv('SEMANTIC_CACHE'))
+        
+        # Retriever
+        self.retriever = create_retriever(
+            vector_store=self.vector_store,
+            k=10,
+            score_threshold=0.0,
+            semantic_cache=create_semantic_query_cache() if use_semantic_cache else None
+        )
+    
+    def search_materials(
+        self,
+        query: str,
+        k: int = 5,
+        filter_dict: Optional[Dict[str, Any]] = None
+    ) -> List[SearchResult]:
+        """
+        Busca materiales en la base de datos vectorial
+        
+        Args:
+            query: Consulta de búsqueda
+            k: Número de resultados
+            filter_dict: Filtros de metadata
+            
+        Returns:
+            Lista de documentos encontrados
+        """
+        try:
+            # Buscar documentos
+            results = self.retriever.retrieve(
+                query=query,
+                k=k,
+                filter_dict=filter_dict
+            )
+            
+            # Convertir a formato de respuesta
+            search_results = [SearchResult(doc.page_content, doc.metadata) for doc in results]
+            
+            logger.info(f"Búsqueda completada: {len(search_results)} resultados")
+            return search_results
+            
+        except Exception as e:
+            logger.error(f"Error en búsqueda: {str(e)}")
+            return []
+    
+    def search_materials_batch(
+        self,
+        queries: List[str],
+        k: int = 5,
+        filter_dict: Optional[Dict[str, Any]] = None
+    ) -> List[List[SearchResult]]:
+        """
+        Busca materiales para varias consultas a la vez: los embeddings se
+        calculan en una sola pasada y ChromaDB resuelve todo en una sola query,
+        que solo trae documentos y metadata (ver BATCH_QUERY_INCLUDE)
+        
+        Args:
+            queries: Consultas de búsqueda
+            k: Número de resultados por consulta
+            filter_dict: Filtros de metadata (comunes a todas las consultas)
+        
+        Returns:
+            Lista de documentos encontrados por cada consulta, en el mismo orden
+        """
+        try:
+            batch_results = self.retriever.retrieve_batch(
+                queries=queries,
+                k=k,
+                filter_dict=filter_dict
+            )
+            
+            search_results = [
+                [SearchResult(doc.page_content, doc.metadata) for doc in results]
+                for results in batch_results
+            ]
+            
+            logger.info(f"Búsqueda por lote completada: {len(search_results)} consultas")
+            return search_results
+            
+        except Exception as e:
+            logger.error(f"Error en búsqueda por lote: {str(e)}")
+            return [[] for _ in queries]
+
+
+class RAGPipeline(RetrievalPipeline):
     """
     Pipeline RAG completo usando LangChain
     """
@@ -38,7 +208,10 @@ class RAGPipeline:
         generator_model_name: str = None,
         chunk_size: int = None,
         chunk_overlap: int = None,
-        reset_collection: bool = False
+        reset_collection: bool = False,
+        embedding_batch_size: Optional[int] = None,
+        embedding_max_seq_length: Optional[int] = None,
+        embedding_cache_path: Optional[str] = None
     ):
         """
         Inicializa el pipeline RAG
@@ -51,11 +224,12 @@ class RAGPipeline:
             chunk_size: Tamaño de chunks
             chunk_overlap: Overlap entre chunks
             reset_collection: Si resetear la colección
+            embedding_batch_size: Batch de encode de embeddings locales
+            embedding_max_seq_length: Tokens máximos por chunk al generar embeddings
+            embedding_cache_path: Archivo de la cache de embeddings de consultas
+                                  (sin cache si no se indica ni hay EMBEDDING_CACHE_PATH)
         """
         # Leer valores de variables de entorno si no se especifican
-        self.collection_name = collection_name or os.getenv('CHROMA_COLLECTION_NAME', 'itba_ejercicios_collection')
-        self.persist_directory = persist_directory or os.getenv('CHROMA_PERSIST_DIRECTORY', './data/processed/chroma_db')
-        self.embedding_model = embedding_model or os.getenv('EMBEDDING_MODEL', 'all-MiniLM-L6-v2')
         self.generator_model_name = generator_model_name or os.getenv('LLM_MODEL', 'gpt-4o-mini')
         self.chunk_size = chunk_size if chunk_size is not None else int(os.getenv('CHUNK_SIZE', '1000'))
         self.chunk_overlap = chunk_overlap if chunk_overlap is not None else int(os.getenv('CHUNK_OVERLAP', '200'))
@@ -67,19 +241,15 @@ class RAGPipeline:
             chunk_overlap=self.chunk_overlap
         )
         
-        # Vector store
-        self.vector_store = create_vector_store(
-            collection_name=self.collection_name,
-            persist_directory=self.persist_directory,
-            embedding_model=self.embedding_model,
-            reset_collection=reset_collection
-        )
-        
-        # Retriever
-        self.retriever = create_retriever(
-            vector_store=self.vector_store,
-            k=10,
-            score_threshold=0.0
+        # Cache de embeddings, vector store y retriever
+        super().__init__(
+            collection_name=collection_name,
+            persist_directory=persist_directory,
+            embedding_model=embedding_model,
+            reset_collection=reset_collection,
+            embedding_batch_size=embedding_batch_size,
+            embedding_max_seq_length=embedding_max_seq_length,
+            embedding_cache_path=embedding_cache_path
         )
         
         # Generador de ejercicios
@@ -91,7 +261,8 @@ class RAGPipeline:
         self,
         data_directory: str,
         file_extensions: List[str] = None,
-        skip_on_error: bool = True
+        skip_on_error: bool = True,
+        workers: Optional[int] = 1
     ) -> Dict[str, Any]:
         """
         Carga materiales académicos desde un directorio
@@ -100,6 +271,7 @@ class RAGPipeline:
             data_directory: Directorio con los materiales
             file_extensions: Extensiones de archivo a procesar
             skip_on_error: Si continuar cuando hay errores en documentos individuales
+            workers: Procesos para parsear archivos en paralelo (1 = secuencial, None = todos los cores)
             
         Returns:
             Diccionario con estadísticas de carga
@@ -111,7 +283,8 @@ class RAGPipeline:
             # Cargar documentos con metadata académica de la jerarquía de carpetas
             documents = self.data_loader.load_documents_from_directory(
                 directory_path=data_directory,
-                metadata_extractor=self.data_loader.extract_academic_metadata
+                metadata_extractor=self.data_loader.extract_academic_metadata,
+                workers=workers
             )
             
             if not documents:
@@ -133,9 +306,13 @@ class RAGPipeline:
             # Procesar texto (fragmentar en chunks)
             processed_docs = self.text_processor.split_documents(documents)
             
-            # Agregar al vector store
+            # Agregar al vector store en una sola llamada (batches de embeddings grandes)
             doc_ids = self.vector_store.add_documents(processed_docs)
             
+            # Los resultados cacheados ya no reflejan la colección
+            if self.retriever.semantic_cache is not None:
+                self.retriever.semantic_cache.clear()
+            
             # Estadísticas
             stats = {
                 "status": "success",
@@ -235,48 +412,6 @@ class RAGPipeline:
             logger.error(f"Error generando ejercicios: {str(e)}")
             return {"status": "error", "message": str(e)}
     
-    def search_materials(
-        self,
-        query: str,
-        k: int = 5,
-        filter_dict: Optional[Dict[str, Any]] = None
-    ) -> List[Dict[str, Any]]:
-        """
-        Busca materiales en la base de datos vectorial
-        
-        Args:
-            query: Consulta de búsqueda
-            k: Número de resultados
-            filter_dict: Filtros de metadata
-            
-        Returns:
-            Lista de documentos encontrados
-        """
-        try:
-            # Buscar documentos
-            results = self.retriever.retrieve(
-                query=query,
-                k=k,
-                filter_dict=filter_dict
-            )
-            
-            # Convertir a formato de respuesta
-            search_results = []
-            for doc in results:
-                search_results.append({
-                    "content": doc.page_content,
-                    "metadata": doc.metadata
-                })
-            
-            logger.info(f"Búsqueda completada: {len(search_results)} resultados")
-            return search_results
-            
-        except Exception as e:
-            logger.error(f"Error en búsqueda: {str(e)}")
-            return []
-    
-    
-    
     def get_system_info(self) -> Dict[str, Any]:
         """
         Obtiene información del sistema
@@ -359,7 +494,10 @@ def create_rag_pipeline(
     generator_model_name: str = None,
     chunk_size: int = None,
     chunk_overlap: int = None,
-    reset_collection: bool = False
+    reset_collection: bool = False,
+    embedding_batch_size: Optional[int] = None,
+    embedding_max_seq_length: Optional[int] = None,
+    embedding_cache_path: Optional[str] = None
 ) -> RAGPipeline:
     """
     Función de conveniencia para crear un pipeline RAG
@@ -372,6 +510,9 @@ def create_rag_pipeline(
         chunk_size: Tamaño de chunks (por defecto de CHUNK_SIZE)
         chunk_overlap: Overlap entre chunks (por defecto de CHUNK_OVERLAP)
         reset_collection: Si resetear la colección
+        embedding_batch_size: Batch de encode de embeddings locales
+        embedding_max_seq_length: Tokens máximos por chunk al generar embeddings
+        embedding_cache_path: Archivo de la cache de embeddings de consultas
         
     Returns:
         Instancia del pipeline RAG
@@ -383,6 +524,43 @@ def create_rag_pipeline(
         generator_model_name=generator_model_name,
         chunk_size=chunk_size,
         chunk_overlap=chunk_overlap,
-        reset_collection=reset_collection
+        reset_collection=reset_collection,
+        embedding_batch_size=embedding_batch_size,
+        embedding_max_seq_length=embedding_max_seq_length,
+        embedding_cache_path=embedding_cache_path
     )
 
+
+def create_retriever_only(
+    collection_name: str = None,
+    persist_directory: str = None,
+    embedding_model: str = None,
+    embedding_cache_path: Optional[str] = None,
+    use_embedding_cache: Optional[bool] = None,
+    use_semantic_cache: Optional[bool] = None
+) -> RetrievalPipeline:
+    """
+    Función de conveniencia para crear solo la parte de búsqueda del pipeline
+    (sin generador: no requiere OPENAI_API_KEY con embeddings locales)
+    
+    Args:
+        collection_name: Nombre de la colección (por defecto de CHROMA_COLLECTION_NAME)
+        persist_directory: Directorio de persistencia (por defecto de CHROMA_PERSIST_DIRECTORY)
+        embedding_model: Modelo de embeddings (por defecto de EMBEDDING_MODEL)
+        embedding_cache_path: Archivo de la cache de embeddings de consultas
+        use_embedding_cache: Si cachear en disco los embeddings de consultas
+                             (por defecto solo con embedding_cache_path o EMBEDDING_CACHE_PATH)
+        use_semantic_cache: Si reutilizar resultados de consultas similares
+                            (por defecto solo con SEMANTIC_CACHE definida)
+        
+    Returns:
+        Instancia con search_materials y search_materials_batch
+    """
+    return RetrievalPipeline(
+        collection_name=collection_name,
+        persist_directory=persist_directory,
+        embedding_model=embedding_model,
+        embedding_cache_path=embedding_cache_path,
+        use_embedding_cache=use_embedding_cache,
+        use_semantic_cache=use_semantic_cache
+    )
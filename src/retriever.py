@@ -16,7 +16,7 @@ class Retriever:
     Wrapper del Retriever nativo de LangChain con capacidades de filtrado avanzado
     """
     
-    def __init__(self, vector_store, k: int = 5, score_threshold: float = 0.0):
+    def __init__(self, vector_store, k: int = 5, score_threshold: float = 0.0, semantic_cache=None):
         """
         Inicializa el retriever usando el retriever nativo de LangChain
         
@@ -24,10 +24,13 @@ class Retriever:
             vector_store: Instancia del vector store de LangChain
             k: Número de documentos a recuperar por defecto
             score_threshold: Umbral mínimo de similitud
+            semantic_cache: Cache de resultados por consultas similares
+                            (SemanticQueryCache, None = sin cache)
         """
         self.vector_store = vector_store
         self.k = k
         self.score_threshold = score_threshold
+        self.semantic_cache = semantic_cache
         
         # Crear retriever nativo de LangChain
         self._create_native_retriever()
@@ -49,7 +52,8 @@ class Retriever:
         query: str,
         k: Optional[int] = None,
         filter_dict: Optional[str] = None,
-        include_scores: bool = False
+        include_scores: bool = False,
+        use_cache: bool = True
     ) -> List[Document]:
         """
         Recupera documentos relevantes usando el retriever nativo de LangChain
@@ -59,6 +63,7 @@ class Retriever:
             k: Número de documentos a recuperar
             filter_dict: Filtros de metadata
             include_scores: Si incluir scores de similitud
+            use_cache: Si usar la cache semántica (si el retriever tiene una)
             
         Returns:
             Lista de documentos recuperados
@@ -66,6 +71,26 @@ class Retriever:
         try:
             k = k or self.k
             
+            if use_cache and self.semantic_cache is not None and not include_scores:
+                # Consultas iguales o casi iguales (mismo k y filtros) reutilizan
+                # los resultados sin volver a consultar ChromaDB
+                scope = (k, repr(filter_dict))
+                cached, query_embedding = self.semantic_cache.lookup(
+                    query, scope, self.vector_store.embedding_function.embed_query
+                )
+                if cached is not None:
+                    logger.info(f"Recuperados {len(cached)} documentos (cache semántica)")
+                    return cached
+                # Buscar con el embedding ya calculado por la cache
+                results = self.vector_store.similarity_search_by_vector(
+                    embedding=query_embedding,
+                    k=k,
+                    filter_dict=filter_dict
+                )
+                self.semantic_cache.store(query, scope, query_embedding, results)
+                logger.info(f"Recuperados {len(results)} documentos")
+                return results
+            
             if include_scores:
                 # Búsqueda con scores usando método directo
                 results = self.vector_store.similarity_search_with_score(
@@ -103,7 +128,38 @@ class Retriever:
             logger.error(f"Error en recuperación: {str(e)}")
             raise
     
+    def retrieve_batch(
+        self,
+        queries: List[str],
+        k: Optional[int] = None,
+        filter_dict: Optional[Dict[str, Any]] = None
+    ) -> List[List[Document]]:
+        """
+        Recupera documentos para varias consultas con una sola búsqueda por lote
+        (un solo cálculo de embeddings y una sola query a ChromaDB)
+        
+        Args:
+            queries: Consultas de búsqueda
+            k: Número de documentos a recuperar por consulta
+            filter_dict: Filtros de metadata (comunes a todas las consultas)
+        
+        Returns:
+            Lista de documentos recuperados por cada consulta
+        """
+        try:
+            results = self.vector_store.similarity_search_batch(
+                queries=queries,
+                k=k or self.k,
+                filter_dict=filter_dict
+            )
+            logger.info(f"Recuperados documentos para {len(results)} consultas (lote)")
+            return results
+            
+        except Exception as e:
+            logger.error(f"Error en recuperación por lote: {str(e)}")
+            raise
 
+    
     def get_native_retriever(self) -> VectorStoreRetriever:
         """
         Retorna el retriever nativo de LangChain
@@ -116,7 +172,8 @@ class Retriever:
 def create_retriever(
     vector_store,
     k: int = 5,
-    score_threshold: float = 0.0
+    score_threshold: float = 0.0,
+    semantic_cache=None
 ) -> Retriever:
     """
     Función de conveniencia para crear un retriever con LangChain
@@ -125,6 +182,7 @@ def create_retriever(
         vector_store: Instancia del vector store
         k: Número de documentos a recuperar
         score_threshold: Umbral de score
+        semantic_cache: Cache de resultados por consultas similares (None = sin cache)
         
     Returns:
         Instancia del retriever
@@ -132,7 +190,8 @@ def create_retriever(
     return Retriever(
         vector_store=vector_store,
         k=k,
-        score_threshold=score_threshold
+        score_threshold=score_threshold,
+        semantic_cache=semantic_cache
     )
 
 
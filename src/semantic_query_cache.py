@@ -0,0 +1,134 @@
+"""
+Semantic Query Cache Module
+Cache LRU en memoria de resultados de búsqueda por similitud de consultas
+"""
+
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class SemanticQueryCache:
+    """
+    Cache LRU de resultados de búsqueda: una consulta reutiliza los resultados
+    de otra ya resuelta si es idéntica o si sus embeddings tienen similitud
+    coseno >= threshold (con los mismos k y filtros)
+    """
+    
+    def __init__(self, max_size: int = 256, threshold: float = 0.95):
+        """
+        Inicializa la cache
+        
+        Args:
+            max_size: Cantidad máxima de consultas guardadas
+            threshold: Similitud coseno mínima para reutilizar resultados
+        """
+        self.max_size = max_size
+        self.threshold = threshold
+        # (scope, consulta) -> (embedding normalizado, resultados)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def lookup(
+        self,
+        query: str,
+        scope: Hashable,
+        embed: Callable[[str], List[float]]
+    ) -> Tuple[Optional[List[Any]], Optional[List[float]]]:
+        """
+        Busca resultados para una consulta: primero por texto exacto (sin
+        calcular el embedding) y si no, por similitud con las consultas
+        guardadas del mismo scope
+        
+        Args:
+            query: Consulta de búsqueda
+            scope: Parámetros que deben coincidir (k, filtros)
+            embed: Función que calcula el embedding de la consulta
+        
+        Returns:
+            (resultados o None, embedding de la consulta o None si hubo
+            acierto exacto); ante un fallo el embedding sirve para buscar
+            sin recalcularlo y se pasa luego a store()
+        """
+        key = (scope, query.strip())
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return list(entry[1]), None
+        
+        embedding = embed(query)
+        vector = self._normalize(embedding)
+        
+        with self._lock:
+            keys = [k for k in self._entries if k[0] == scope]
+            if keys:
+                matrix = np.stack([self._entries[k][0] for k in keys])
+                similarities = matrix @ vector
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.threshold:
+                    self._entries.move_to_end(keys[best])
+                    logger.info(f"Cache semántica: '{query[:50]}' reutiliza '{keys[best][1][:50]}' "
+                                f"(similitud {similarities[best]:.3f})")
+                    return list(self._entries[keys[best]][1]), embedding
+        
+        return None, embedding
+    
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        """Embedding como vector float32 de norma 1"""
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector = vector / norm
+        return vector
+    
+    def store(self, query: str, scope: Hashable, embedding: List[float], results: List[Any]):
+        """
+        Guarda los resultados de una consulta, descartando las más antiguas
+        
+        Args:
+            query: Consulta de búsqueda
+            scope: Parámetros de la búsqueda (k, filtros)
+            embedding: Embedding de la consulta devuelto por lookup()
+            results: Resultados de la búsqueda
+        """
+        vector = self._normalize(embedding)
+        with self._lock:
+            key = (scope, query.strip())
+            self._entries[key] = (vector, list(results))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+    
+    def clear(self):
+        """Vacía la cache"""
+        with self._lock:
+            self._entries.clear()
+
+
+def create_semantic_query_cache(
+    max_size: Optional[int] = None,
+    threshold: Optional[float] = None
+) -> SemanticQueryCache:
+    """
+    Función de conveniencia para crear la cache semántica de consultas
+    
+    Args:
+        max_size: Consultas guardadas (por defecto de SEMANTIC_CACHE_SIZE, 256)
+        threshold: Similitud mínima (por defecto de SEMANTIC_CACHE_THRESHOLD, 0.95)
+    
+    Returns:
+        Instancia de la cache
+    """
+    if max_size is None:
+        max_size = int(os.getenv('SEMANTIC_CACHE_SIZE', '256'))
+    if threshold is None:
+        threshold = float(os.getenv('SEMANTIC_CACHE_THRESHOLD', '0.95'))
+    return SemanticQueryCache(max_size=max_size, threshold=threshold)
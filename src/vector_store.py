@@ -14,6 +14,10 @@ load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# Campos que devuelven las búsquedas por lote: sin embeddings (k * dim floats
+# por consulta que nadie usa) ni distancias
+BATCH_QUERY_INCLUDE = ["documents", "metadatas"]
+
 
 class VectorStore:
     """
@@ -25,7 +29,10 @@ class VectorStore:
         collection_name: str = None,
         persist_directory: str = None,
         embedding_model: str = None,
-        reset_collection: bool = False
+        reset_collection: bool = False,
+        embedding_batch_size: Optional[int] = None,
+        max_seq_length: Optional[int] = None,
+        embedding_cache=None
     ):
         """
         Inicializa el vector store con LangChain
@@ -35,11 +42,20 @@ class VectorStore:
             persist_directory: Directorio para persistencia
             embedding_model: Modelo de embeddings
             reset_collection: Si resetear la colección existente
+            embedding_batch_size: Batch de encode para sentence-transformers
+                                  (None = default de la librería, 32)
+            max_seq_length: Tokens máximos por chunk para sentence-transformers
+                            (None = default del modelo)
+            embedding_cache: Cache en disco de embeddings de consultas
+                             (EmbeddingCache, None = sin cache)
         """
         # Leer valores de variables de entorno si no se especifican
         self.collection_name = collection_name or os.getenv('CHROMA_COLLECTION_NAME', 'itba_ejercicios_collection')
         self.persist_directory = persist_directory or os.getenv('CHROMA_PERSIST_DIRECTORY', './data/processed/chroma_db')
         self.embedding_model = embedding_model or os.getenv('EMBEDDING_MODEL', 'all-MiniLM-L6-v2')
+        self.embedding_batch_size = embedding_batch_size
+        self.max_seq_length = max_seq_length
+        self.embedding_cache = embedding_cache
         self.vectorstore = None
         
         # Crear directorio de persistencia si no existe
@@ -65,14 +81,30 @@ class VectorStore:
                     openai_model = self.embedding_model
                 
                 self.embedding_function = OpenAIEmbeddings(model=openai_model)
+                resolved_model = openai_model
                 logger.info(f"Usando OpenAI embeddings: {openai_model}")
             else:
                 # Usar embeddings locales con sentence-transformers
                 from langchain_community.embeddings.sentence_transformer import SentenceTransformerEmbeddings
+                encode_kwargs = {}
+                if self.embedding_batch_size:
+                    encode_kwargs['batch_size'] = self.embedding_batch_size
                 self.embedding_function = SentenceTransformerEmbeddings(
-                    model_name=self.embedding_model
+                    model_name=self.embedding_model,
+                    encode_kwargs=encode_kwargs
                 )
+                if self.max_seq_length:
+                    # El costo de atención crece cuadráticamente con la longitud
+                    self.embedding_function.client.max_seq_length = self.max_seq_length
                 logger.info(f"Usando sentence-transformers: {self.embedding_model}")
+                resolved_model = self.embedding_model
+            
+            if self.embedding_cache is not None:
+                # Las consultas repetidas no vuelven a pasar por el modelo
+                from .embedding_cache import CachedQueryEmbeddings
+                self.embedding_function = CachedQueryEmbeddings(
+                    self.embedding_function, self.embedding_cache, resolved_model
+                )
             
             # Verificar si existe colección y resetear si es necesario
             if reset_collection and self._collection_exists():
@@ -126,7 +158,7 @@ class VectorStore:
     def add_documents(
         self, 
         documents: List[Any],
-        batch_size: int = 100
+        batch_size: Optional[int] = None
     ) -> List[str]:
         """
         Agrega documentos al vector store
@@ -134,6 +166,7 @@ class VectorStore:
         Args:
             documents: Lista de documentos a agregar
             batch_size: Tamaño del lote para procesamiento
+                        (None = 100, o embedding_batch_size si es mayor)
             
         Returns:
             Lista de IDs de documentos agregados
@@ -143,7 +176,10 @@ class VectorStore:
                 logger.warning("No hay documentos para agregar")
                 return []
             
-            # Procesar en lotes para documentos grandes
+            # Procesar en lotes para documentos grandes; cada lote no puede
+            # ser menor que el batch de embeddings o el encode queda recortado
+            if batch_size is None:
+                batch_size = max(100, self.embedding_batch_size or 0)
             all_ids = []
             for i in range(0, len(documents), batch_size):
                 batch = documents[i:i + batch_size]
@@ -220,6 +256,45 @@ class VectorStore:
             logger.error(f"Error en búsqueda por similitud: {str(e)}")
             raise
     
+    def similarity_search_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 5,
+        filter_dict: Optional[Dict[str, Any]] = None
+    ) -> List[Any]:
+        """
+        Búsqueda por similitud a partir del embedding ya calculado de una consulta
+        
+        Args:
+            embedding: Embedding de la consulta
+            k: Número de resultados a retornar
+            filter_dict: Filtros de metadata
+            
+        Returns:
+            Lista de documentos similares
+        """
+        try:
+            if filter_dict:
+                # Convertir filtros al formato ChromaDB
+                chroma_filter = self._convert_filter_to_chroma_format(filter_dict)
+                results = self.vectorstore.similarity_search_by_vector(
+                    embedding=embedding,
+                    k=k,
+                    filter=chroma_filter
+                )
+            else:
+                results = self.vectorstore.similarity_search_by_vector(
+                    embedding=embedding,
+                    k=k
+                )
+            
+            logger.info(f"Búsqueda por vector completada: {len(results)} resultados")
+            return results
+            
+        except Exception as e:
+            logger.error(f"Error en búsqueda por vector: {str(e)}")
+            raise
+    
     def similarity_search_with_score(
         self,
         query: str,
@@ -259,6 +334,57 @@ class VectorStore:
             logger.error(f"Error en búsqueda con scores: {str(e)}")
             raise
     
+    def similarity_search_batch(
+        self,
+        queries: List[str],
+        k: int = 5,
+        filter_dict: Optional[Dict[str, Any]] = None
+    ) -> List[List[Any]]:
+        """
+        Búsqueda por similitud de varias consultas a la vez: los embeddings de
+        todas las consultas se calculan en una sola pasada del modelo y ChromaDB
+        resuelve todas las búsquedas en una sola query
+        
+        Args:
+            queries: Consultas de búsqueda
+            k: Número de resultados por consulta
+            filter_dict: Filtros de metadata (comunes a todas las consultas)
+        
+        Returns:
+            Lista de documentos similares por cada consulta, en el mismo orden
+        """
+        try:
+            from langchain_core.documents import Document
+            
+            if not queries:
+                return []
+            
+            if self.embedding_cache is not None:
+                query_embeddings = self.embedding_function.embed_queries(list(queries))
+            else:
+                query_embeddings = self.embedding_function.embed_documents(list(queries))
+            results = self.vectorstore._collection.query(
+                query_embeddings=query_embeddings,
+                n_results=k,
+                where=self._convert_filter_to_chroma_format(filter_dict),
+                include=BATCH_QUERY_INCLUDE
+            )
+            
+            batch_results = [
+                [
+                    Document(page_content=text, metadata=metadata or {})
+                    for text, metadata in zip(texts, metadatas)
+                ]
+                for texts, metadatas in zip(results["documents"], results["metadatas"])
+            ]
+            
+            logger.info(f"Búsqueda por lote completada: {len(queries)} consultas")
+            return batch_results
+            
+        except Exception as e:
+            logger.error(f"Error en búsqueda por lote: {str(e)}")
+            raise
+    
     def get_collection_info(self) -> Dict[str, Any]:
         """
         Obtiene información de la colección
@@ -317,7 +443,10 @@ def create_vector_store(
     collection_name: str = None,
     persist_directory: str = None,
     embedding_model: str = None,
-    reset_collection: bool = False
+    reset_collection: bool = False,
+    embedding_batch_size: Optional[int] = None,
+    max_seq_length: Optional[int] = None,
+    embedding_cache=None
 ) -> VectorStore:
     """
     Función de conveniencia para crear un vector store con LangChain
@@ -327,6 +456,9 @@ def create_vector_store(
         persist_directory: Directorio de persistencia (por defecto de CHROMA_PERSIST_DIRECTORY)
         embedding_model: Modelo de embeddings (por defecto de EMBEDDING_MODEL)
         reset_collection: Si resetear la colección
+        embedding_batch_size: Batch de encode para sentence-transformers
+        max_seq_length: Tokens máximos por chunk para sentence-transformers
+        embedding_cache: Cache en disco de embeddings de consultas (None = sin cache)
         
     Returns:
         Instancia del vector store
@@ -335,6 +467,9 @@ def create_vector_store(
         collection_name=collection_name,
         persist_directory=persist_directory,
         embedding_model=embedding_model,
-        reset_collection=reset_collection
+        reset_collection=reset_collection,
+        embedding_batch_size=embedding_batch_size,
+        max_seq_length=max_seq_length,
+        embedding_cache=embedding_cache
     )
 
@@ -0,0 +1,38 @@
+"""
+Smoke test de captioning con BLIP: una imagen, un caption no vacío.
+Se saltea si faltan torch/transformers/PyMuPDF o no se pueden obtener los pesos.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("transformers")
+pytest.importorskip("fitz")
+np = pytest.importorskip("numpy")
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from image_utils import pdf_to_text_blip as blip  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def blip_cpu():
+    try:
+        return blip._load_blip(blip.DEFAULT_BLIP_MODEL, "cpu", torch.float32)
+    except OSError as e:  # sin red ni pesos en la cache de Hugging Face
+        pytest.skip(f"No se pudo cargar {blip.DEFAULT_BLIP_MODEL}: {e}")
+
+
+def test_caption_en_batch_returns_non_empty_caption(blip_cpu):
+    processor, model = blip_cpu
+    # Imagen simple: un cuadrado oscuro sobre fondo claro
+    image = np.full((384, 384, 3), 230, dtype=np.uint8)
+    image[96:288, 96:288] = 30
+    
+    captions = blip._caption_en_batch([image], processor, model, "cpu")
+    
+    assert len(captions) == 1
+    assert captions[0].strip()